@@ -0,0 +1,85 @@
+"""
+Content-addressed disk cache for analysis results.
+
+Results are stored as pickles under CACHE_CONFIG['cache_dir'], keyed by the
+data hash and the analysis parameters, so repeated runs with the same inputs
+(also across sessions and server restarts) skip the computation entirely.
+"""
+
+import hashlib
+import os
+import pickle
+import shutil
+from typing import Any, Dict, List, Optional
+
+from config import CACHE_CONFIG
+
+
+CACHE_DIR = CACHE_CONFIG['cache_dir']
+CACHE_VERSION = CACHE_CONFIG['cache_version']
+# The app log lives next to the cache but survives clear_cache
+LOG_FILE_NAME = 'app.log'
+
+
+def get_cache_key(data_hash: str, start_years: List[int], windows: List[int],
+                  thresholds: List[float]) -> str:
+    """Build the cache key for a data set and analysis configuration."""
+    key_str = f"v{CACHE_VERSION}|{data_hash}|{start_years}|{windows}|{thresholds}"
+    return hashlib.blake2b(key_str.encode()).hexdigest()
+
+
+def get_results_hash(results: Dict[str, Any], config: Dict[str, Any]) -> str:
+    """Content hash of analysis results and the parameters that produced them."""
+    payload = (
+        {k: v for k, v in results.items() if k != 'config'},
+        config.get('start_years'), config.get('windows'), config.get('thresholds')
+    )
+    return hashlib.blake2b(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+
+
+def _cache_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, f"{key}.pkl")
+
+
+def load_cached_results(key: str) -> Optional[Dict[str, Any]]:
+    """Return cached results for key, or None on a miss or unreadable entry."""
+    path = _cache_path(key)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except Exception:
+        # Corrupt or incompatible entry - treat as a miss
+        return None
+
+
+def save_cached_results(key: str, results: Dict[str, Any]) -> None:
+    """Store results under key. Failures are ignored, the cache is best effort."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = _cache_path(key) + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(results, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, _cache_path(key))
+    except Exception:
+        pass
+
+
+def clear_cache() -> None:
+    """Remove all cached results (the app log files are kept)."""
+    if not os.path.isdir(CACHE_DIR):
+        return
+
+    for name in os.listdir(CACHE_DIR):
+        if name.startswith(LOG_FILE_NAME):
+            continue
+        path = os.path.join(CACHE_DIR, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,262 @@
+"""
+Numerical kernels for the S&P 500 rolling returns analysis.
+
+The kernels operate on plain float64 arrays so they can be JIT-compiled with
+numba when it is installed. Without numba the decorators below are no-ops and
+the same functions run as regular Python code.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # numba is optional
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit when numba is not installed."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
+
+
+# Same tolerance as sp500_convergence.FLOATING_TOLERANCE
+FLOATING_TOLERANCE = 1e-12
+
+
+def log_return_prefix(returns):
+    """
+    Cumulative log-return prefix sum: cum[k] = sum(log(1 + r[:k])).
+
+    The log-return of any window [i, j) is then cum[j] - cum[i]. A slice
+    cum[s:] is a valid prefix for the series starting at s, since only
+    differences are used.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    return np.concatenate((np.zeros(1), np.cumsum(np.log1p(returns))))
+
+
+@njit(cache=True, nogil=True)
+def rolling_cagr(log_prefix, window):
+    """
+    Compute the CAGR of every contiguous window from a log-return prefix sum.
+
+    Each window costs O(1): CAGR = expm1((cum[i + window] - cum[i]) / window).
+
+    Args:
+        log_prefix: float64 prefix array from log_return_prefix (length n + 1)
+        window: Window size in years
+
+    Returns:
+        float64 array with one CAGR per window (empty if the series is too short)
+    """
+    n = log_prefix.shape[0] - window
+    if window <= 0 or n <= 0:
+        return np.empty(0, dtype=np.float64)
+
+    out = np.empty(n, dtype=np.float64)
+    for i in range(n):
+        cagr = np.expm1((log_prefix[i + window] - log_prefix[i]) / window)
+        if abs(cagr) < FLOATING_TOLERANCE:
+            cagr = 0.0
+        out[i] = cagr
+
+    return out
+
+
+@njit(cache=True, nogil=True)
+def horizon_extremes(log_prefix):
+    """
+    Summarise the rolling CAGRs of every holding horizon in a single pass.
+
+    For each horizon h = 1..n the CAGRs of all h-year windows are derived from
+    the cumulative log-return prefix sum, and their best/worst value, the
+    offset of the first best/worst window and the mean are recorded.
+
+    Args:
+        log_prefix: float64 prefix array from log_return_prefix (length n + 1)
+
+    Returns:
+        Tuple of arrays indexed by h - 1:
+        (best_cagr, worst_cagr, best_offset, worst_offset, mean_cagr)
+    """
+    n = log_prefix.shape[0] - 1
+    cum = log_prefix
+
+    best = np.empty(n, dtype=np.float64)
+    worst = np.empty(n, dtype=np.float64)
+    best_offset = np.zeros(n, dtype=np.int64)
+    worst_offset = np.zeros(n, dtype=np.int64)
+    mean = np.empty(n, dtype=np.float64)
+
+    for h in range(1, n + 1):
+        count = n - h + 1
+        total = 0.0
+        for i in range(count):
+            cagr = np.expm1((cum[i + h] - cum[i]) / h)
+            if abs(cagr) < FLOATING_TOLERANCE:
+                cagr = 0.0
+            if i == 0 or cagr > best[h - 1]:
+                best[h - 1] = cagr
+                best_offset[h - 1] = i
+            if i == 0 or cagr < worst[h - 1]:
+                worst[h - 1] = cagr
+                worst_offset[h - 1] = i
+            total += cagr
+        mean[h - 1] = total / count
+
+    return best, worst, best_offset, worst_offset, mean
+
+
+@njit(cache=True, nogil=True)
+def _sorted_percentile(sorted_values, q):
+    """Linear-interpolated percentile (numpy's default method) of sorted values."""
+    pos = q / 100.0 * (sorted_values.shape[0] - 1)
+    lo = int(np.floor(pos))
+    hi = min(lo + 1, sorted_values.shape[0] - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+@njit(cache=True, nogil=True)
+def rolling_risk_metrics(returns, risk_free_rates, window):
+    """
+    Risk metrics of every contiguous window, as in risk_metrics.RiskMetricsCalculator.
+
+    Each window is summarised in compiled code instead of building a
+    RiskMetricsCalculator per window. Standard deviations use the same
+    two-pass (ddof=1) formula as numpy, so results match the reference
+    implementation to floating point precision.
+
+    Args:
+        returns: float64 array of annual returns
+        risk_free_rates: float64 array of risk-free rates aligned with returns
+            (at least as long as returns)
+        window: Window size in years
+
+    Returns:
+        Tuple of float64 arrays with one value per window:
+        (sharpe_ratio, sortino_ratio, calmar_ratio, volatility, max_drawdown,
+         var_95, cvar_95, var_99, cvar_99)
+    """
+    n = returns.shape[0] - window + 1
+    if window <= 0 or n <= 0:
+        n = 0
+
+    sharpe = np.full(n, np.nan)
+    sortino = np.full(n, np.nan)
+    calmar = np.full(n, np.nan)
+    volatility = np.full(n, np.nan)
+    max_drawdown = np.full(n, np.nan)
+    var_95 = np.full(n, np.nan)
+    cvar_95 = np.full(n, np.nan)
+    var_99 = np.full(n, np.nan)
+    cvar_99 = np.full(n, np.nan)
+
+    if window < 2:
+        return sharpe, sortino, calmar, volatility, max_drawdown, var_95, cvar_95, var_99, cvar_99
+
+    for i in range(n):
+        r = returns[i:i + window]
+        excess = r - risk_free_rates[i:i + window]
+
+        # Sharpe ratio and volatility (sample standard deviations)
+        mean_excess = excess.mean()
+        mean_return = r.mean()
+        ss_excess = 0.0
+        ss_return = 0.0
+        downside_ss = 0.0
+        downside_count = 0
+        for k in range(window):
+            d = excess[k] - mean_excess
+            ss_excess += d * d
+            d = r[k] - mean_return
+            ss_return += d * d
+            if excess[k] < 0:
+                downside_ss += excess[k] * excess[k]
+                downside_count += 1
+        std_excess = np.sqrt(ss_excess / (window - 1))
+        if std_excess != 0:
+            sharpe[i] = mean_excess / std_excess
+        volatility[i] = np.sqrt(ss_return / (window - 1))
+
+        # Sortino ratio (downside deviation of negative excess returns)
+        if downside_count == 0:
+            sortino[i] = np.inf
+        else:
+            downside_deviation = np.sqrt(downside_ss / downside_count)
+            if downside_deviation != 0:
+                sortino[i] = mean_excess / downside_deviation
+
+        # Maximum drawdown of the cumulative wealth path
+        cumulative = 1.0
+        running_max = 0.0
+        worst = 0.0
+        for k in range(window):
+            cumulative *= 1.0 + r[k]
+            if k == 0 or cumulative > running_max:
+                running_max = cumulative
+            drawdown = (cumulative - running_max) / running_max
+            if k == 0 or drawdown < worst:
+                worst = drawdown
+        max_drawdown[i] = abs(worst)
+
+        # Calmar ratio
+        if max_drawdown[i] != 0:
+            calmar[i] = (np.power(cumulative, 1.0 / window) - 1.0) / max_drawdown[i]
+
+        # Historical VaR / CVaR need at least 10 observations
+        if window >= 10:
+            sorted_r = np.sort(r)
+            for level in range(2):
+                q = 5.0 if level == 0 else 1.0
+                threshold = _sorted_percentile(sorted_r, q)
+                tail_total = 0.0
+                tail_count = 0
+                for k in range(window):
+                    if sorted_r[k] <= threshold:
+                        tail_total += sorted_r[k]
+                        tail_count += 1
+                if level == 0:
+                    var_95[i] = -threshold
+                    if tail_count > 0:
+                        cvar_95[i] = -tail_total / tail_count
+                else:
+                    var_99[i] = -threshold
+                    if tail_count > 0:
+                        cvar_99[i] = -tail_total / tail_count
+
+    return sharpe, sortino, calmar, volatility, max_drawdown, var_95, cvar_95, var_99, cvar_99
+
+
+def warm_up():
+    """
+    Run every kernel once on a tiny input.
+
+    With numba this triggers the JIT compilation (or loads it from the on-disk
+    cache) up front, so the first real analysis does not pay for it.
+    """
+    log_prefix = log_return_prefix(np.array([0.1, -0.05, 0.2]))
+    rolling_cagr(log_prefix, 2)
+    horizon_extremes(log_prefix)
+    returns = np.linspace(-0.2, 0.3, 10)
+    rolling_risk_metrics(returns, np.full(10, 0.02), 10)
+
+
+# JIT (or pure Python) kernels, kept for build_kernels.py
+JIT_KERNELS = {
+    'rolling_cagr': rolling_cagr,
+    'horizon_extremes': horizon_extremes,
+    'rolling_risk_metrics': rolling_risk_metrics,
+}
+
+# Prefer the ahead-of-time compiled kernels (python build_kernels.py) when present
+try:
+    from sp500_kernels import rolling_cagr, horizon_extremes, rolling_risk_metrics  # noqa: F811
+    AOT_AVAILABLE = True
+except ImportError:
+    AOT_AVAILABLE = False
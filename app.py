@@ -5,21 +5,29 @@ Streamlit Web Application for S&P 500 Rolling Returns and Convergence Analysis
 import streamlit as st
 import pandas as pd
 import numpy as np
+import plotly.graph_objects as go
 from typing import Dict, List, Any
-import traceback
+import importlib.util
+import logging
+import os
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
 
 # Import custom modules
 from data_processor import DataProcessor
 from ui_components import (
     apply_custom_css, create_header, create_sidebar_config,
     display_data_summary, create_returns_timeline_chart,
-    create_rolling_cagr_chart, create_window_comparison_chart,
+    create_rolling_cagr_subplots, create_window_comparison_chart,
     create_convergence_heatmap, create_no_loss_chart,
     display_analysis_table, create_download_section,
-    show_info_message, create_metric_cards, generate_summary_report,
-    create_professional_report_section
+    show_info_message, generate_summary_report,
+    create_professional_report_section, pdf_export_available, markdown_to_pdf_bytes
+)
+from config import APP_TITLE, MESSAGES, FOOTER_TEXT, BENCHMARK_LABELS, BENCHMARK_FMT
+from analysis_cache import (
+    CACHE_DIR, LOG_FILE_NAME, get_cache_key, get_results_hash, load_cached_results, save_cached_results, clear_cache
 )
-from config import APP_TITLE, MESSAGES, FOOTER_TEXT
 
 
 # Page configuration
@@ -33,8 +41,41 @@ st.set_page_config(
 
 
 
+def _get_logger() -> logging.Logger:
+    """App logger writing to a rotating file in the cache directory.
+
+    The script is re-executed on every rerun, so the handler is only attached once.
+    """
+    logger = logging.getLogger("sp500")
+    if not logger.handlers:
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            handler = RotatingFileHandler(
+                os.path.join(CACHE_DIR, LOG_FILE_NAME), maxBytes=1_000_000, backupCount=3, encoding='utf-8'
+            )
+            handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+        except OSError:
+            handler = logging.NullHandler()
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+    return logger
+
+
+logger = _get_logger()
+
+
+@st.cache_resource(show_spinner=False)
+def _warm_up_kernels() -> bool:
+    """Compile/load the numerical kernels once per server process."""
+    from analytics_kernels import warm_up
+    warm_up()
+    return True
+
+
 def initialize_session_state():
     """Initialize session state variables."""
+    _warm_up_kernels()
+
     if 'data_processor' not in st.session_state:
         st.session_state.data_processor = DataProcessor()
     
@@ -49,13 +90,29 @@ def initialize_session_state():
         st.session_state.bi_lang = False
 
 
+@st.cache_resource(show_spinner=False)
+def _shared_slickcharts_data(_processor: DataProcessor):
+    """
+    SlickCharts data shared by all sessions of this server process.
+
+    Returned as the same read-only DataFrame to every session instead of a
+    per-session copy. The DataProcessor itself stays per session since it
+    holds each user's own data and selections.
+    """
+    return _processor.download_slickcharts_data()
+
+
 def load_data(config: Dict[str, Any]) -> bool:
     """Load data based on configuration."""
     processor = st.session_state.data_processor
     
     try:
         if config['data_source'] == "从SlickCharts下载":
-            data = processor.download_slickcharts_data()
+            data = _shared_slickcharts_data(processor)
+            if data is None:
+                # Do not keep a failed download cached for every session
+                _shared_slickcharts_data.clear()
+                DataProcessor.download_slickcharts_data.clear()
         else:
             if config['uploaded_file'] is not None:
                 data = processor.load_csv_data(config['uploaded_file'])
@@ -70,68 +127,93 @@ def load_data(config: Dict[str, Any]) -> bool:
                 return True
     
     except Exception as e:
-        st.error(f"数据加载失败: {str(e)}")
-        st.error(traceback.format_exc())
+        logger.exception("load_data failed")
+        st.error(f"数据加载失败: {str(e)}（详情见日志）")
     
     return False
 
 
-def run_analysis(config: Dict[str, Any]):
-    """Run the complete analysis."""
+@st.cache_data(show_spinner=False)
+def _compute_results(data_hash: str, start_years: tuple, windows: tuple, thresholds: tuple,
+                     _processor: DataProcessor) -> Dict[str, Any]:
+    """
+    Compute all analysis results, memoized on the data hash and parameters.
+
+    The processor itself is not hashed; data_hash identifies its data.
+    """
+    # Compute rolling, no-loss, convergence and risk metrics analysis in one pass
+    fused_results = _processor.compute_all_analyses(
+        list(start_years), list(windows), list(thresholds), data_hash
+    )
+
+    return {
+        'rolling': fused_results.get('rolling', {}),
+        'no_loss': fused_results.get('no_loss', {}),
+        'convergence': fused_results.get('convergence', {}),
+        'no_loss_records': fused_results.get('no_loss_records', {}),
+        'convergence_records': fused_results.get('convergence_records', {}),
+        'risk_metrics': fused_results.get('risk_metrics', {}),
+        'risk_errors': fused_results.get('risk_errors', {})
+    }
+
+
+def run_analysis(config: Dict[str, Any], force: bool = False):
+    """Run the complete analysis.
+
+    Skipped when neither the config nor the data changed since the last run,
+    and results are looked up in the disk cache first, unless force is set.
+    """
     if not st.session_state.data_loaded:
         st.warning("请先加载数据")
         return
     
     processor = st.session_state.data_processor
+
+    # Nothing changed since the last successful run: keep the current results
+    analysis_sig = (_config_key(config), processor.get_data_hash())
+    if not force and st.session_state.analysis_results and st.session_state.get('last_analysis_sig') == analysis_sig:
+        st.info("结果已是最新")
+        return
     
     try:
         with st.spinner("正在进行分析..."):
             # Get data hash for cache invalidation
             data_hash = processor.get_data_hash()
-
-            # Compute rolling analysis
-            rolling_results = processor.compute_rolling_analysis(
-                config['start_years'],
-                config['windows'],
-                data_hash
-            )
-
-            # Compute no-loss analysis
-            no_loss_results = processor.compute_no_loss_analysis(
-                config['start_years'],
-                data_hash
+            cache_key = get_cache_key(
+                data_hash, config['start_years'], config['windows'], config['thresholds']
             )
 
-            # Compute convergence analysis
-            convergence_results = processor.compute_convergence_analysis(
-                config['start_years'],
-                config['thresholds'],
-                data_hash
-            )
+            results = None if force else load_cached_results(cache_key)
+            if results is None:
+                if force:
+                    _compute_results.clear()
+                results = _compute_results(
+                    data_hash,
+                    tuple(config['start_years']),
+                    tuple(config['windows']),
+                    tuple(config['thresholds']),
+                    processor
+                )
+                # Keep failed risk metrics out of the disk cache so a later run retries them
+                if not results.get('risk_errors'):
+                    save_cached_results(cache_key, results)
 
-            # Compute risk metrics analysis
-            risk_metrics_results = processor.compute_risk_metrics_analysis(
-                config['start_years'],
-                config['windows'],
-                data_hash
-            )
+            for start_year, message in results.get('risk_errors', {}).items():
+                st.error(f"风险指标分析失败 ({start_year}): {message}")
 
             # Store results in session state
-            st.session_state.analysis_results = {
-                'rolling': rolling_results,
-                'no_loss': no_loss_results,
-                'convergence': convergence_results,
-                'risk_metrics': risk_metrics_results,
-                'config': config
-            }
+            st.session_state.analysis_results = {**results, 'config': config}
+            st.session_state.results_blob_hash = get_results_hash(results, config)
+            st.session_state.last_analysis_sig = analysis_sig
             
             st.success(MESSAGES['analysis_complete'])
     
     except Exception as e:
-        st.error(f"分析失败: {str(e)}")
-        st.error(traceback.format_exc())
+        logger.exception("run_analysis failed")
+        st.error(f"分析失败: {str(e)}（详情见日志）")
 
 
+@st.fragment
 def display_data_overview():
     """Display data overview tab."""
     processor = st.session_state.data_processor
@@ -146,18 +228,129 @@ def display_data_overview():
     
     # Display returns timeline chart
     st.subheader("📊 历年收益率时间线")
-    timeline_chart = create_returns_timeline_chart(processor.data)
+    timeline_chart = _cached_timeline_fig(processor.get_data_hash(), processor.data)
     st.plotly_chart(timeline_chart, use_container_width=True)
     
     # Display raw data table
     st.subheader("📋 原始数据")
+    display_raw_data_table(processor.get_data_hash())
+
+
+@st.cache_data(show_spinner=False)
+def _cached_timeline_fig(data_hash: str, _data):
+    """Returns timeline chart (downsampled for long series), memoized on the data hash."""
+    return create_returns_timeline_chart(_data)
+
+
+@st.cache_data(show_spinner=False)
+def _display_data(data_hash: str, _data):
+    """Raw data with float columns downcast to float32 for the table view, plus the full CSV."""
+    # year is already int16 (DataProcessor.set_data); only the float columns shrink
+    display_df = _data.astype({c: 'float32' for c in _data.select_dtypes('float64').columns})
+    return display_df, _data.to_csv(index=False).encode('utf-8')
+
+
+@st.fragment
+def display_raw_data_table(data_hash: str, page_size: int = 200):
+    """Paged raw data table; re-renders on its own when the row slider moves."""
+    processor = st.session_state.data_processor
+    display_df, full_csv = _display_data(data_hash, processor.data)
+
+    start_row = 0
+    if len(display_df) > page_size:
+        start_row = st.slider("起始行", 0, len(display_df) - page_size, 0, step=1, key="raw_data_start_row")
+
+    float_cols = display_df.select_dtypes('float32').columns
     st.dataframe(
-        processor.data,
+        display_df.iloc[start_row:start_row + page_size],
         use_container_width=True,
-        height=400
+        height=400,
+        column_config={c: st.column_config.NumberColumn(format="%.4f") for c in float_cols}
+    )
+    st.download_button(
+        "📥 下载完整CSV",
+        data=full_csv,
+        file_name="sp500_data.csv",
+        mime="text/csv",
+        key="download_raw_data"
+    )
+
+
+# Column formats of the rolling window summary table
+_ROLLING_FMT_COLS = {
+    'best_cagr': 'percentage',
+    'worst_cagr': 'percentage',
+    'avg_cagr': 'percentage',
+    'std_cagr': 'percentage',
+    'p10_cagr': 'percentage',
+    'median_cagr': 'percentage',
+    'p90_cagr': 'percentage',
+    'stability_index': 'decimal',
+    'variation_coeff': 'decimal'
+}
+
+# Display names of the no-loss / convergence detail record columns
+_NO_LOSS_COLUMN_NAMES = {
+    'start_year_series': '起始年份',
+    'min_holding_years': '最小持有期',
+    'worst_window': '最差窗口',
+    'worst_cagr': '最差CAGR',
+    'best_window': '最佳窗口',
+    'best_cagr': '最佳CAGR',
+    'average_cagr': '平均CAGR',
+    'num_windows_checked': '检查窗口数'
+}
+_CONVERGENCE_COLUMN_NAMES = {
+    'start_year_series': '起始年份',
+    'threshold': '阈值',
+    'min_holding_years': '最小持有期',
+    'best_window': '最佳窗口',
+    'best_cagr': '最佳CAGR',
+    'worst_window': '最差窗口',
+    'worst_cagr': '最差CAGR',
+    'spread': '收益差'
+}
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_rolling_fig(results_blob_hash: str, start_years: List[int], _analysis_results: Dict[str, Any]):
+    """Rolling CAGR subplots for all start years, memoized on the results hash."""
+    return create_rolling_cagr_subplots(_analysis_results['rolling'], start_years)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_comparison_fig(results_blob_hash: str, start_years: List[int], _analysis_results: Dict[str, Any]):
+    """Window comparison chart memoized on the results hash."""
+    return create_window_comparison_chart(_analysis_results['rolling'], start_years)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_no_loss_fig(results_blob_hash: str, _analysis_results: Dict[str, Any]):
+    """No-loss chart memoized on the results hash."""
+    return create_no_loss_chart(_analysis_results['no_loss'])
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_convergence_fig(results_blob_hash: str, start_years: List[int], thresholds: List[float],
+                            _analysis_results: Dict[str, Any]):
+    """Convergence heatmap memoized on the results hash."""
+    return create_convergence_heatmap(
+        _analysis_results['convergence'], start_years, thresholds,
+        convergence_records=_analysis_results.get('convergence_records')
     )
 
 
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_records_table(results_blob_hash: str, records_key: str, _analysis_results: Dict[str, Any]):
+    """Long-format detail table built once from the result records, memoized on the results hash."""
+    records = _analysis_results.get(records_key)
+    if not records or not len(records['start_year_series']):
+        return None
+    column_names = _NO_LOSS_COLUMN_NAMES if records_key == 'no_loss_records' else _CONVERGENCE_COLUMN_NAMES
+    return pd.DataFrame(records).rename(columns=column_names)
+
+
+@st.fragment
 def display_rolling_analysis():
     """Display rolling CAGR analysis tab."""
     if 'rolling' not in st.session_state.analysis_results:
@@ -166,71 +359,51 @@ def display_rolling_analysis():
     
     rolling_results = st.session_state.analysis_results['rolling']
     config = st.session_state.analysis_results['config']
+    results_hash = st.session_state.get('results_blob_hash')
+    processor = st.session_state.data_processor
+    summary_dfs = processor.create_summary_dataframe_all(rolling_results, config['start_years'])
+    
+    # Rolling CAGR charts for all start years in one figure
+    st.subheader("📈 滚动CAGR走势")
+    chart = _cached_rolling_fig(results_hash, config['start_years'], st.session_state.analysis_results)
+    if chart:
+        st.plotly_chart(chart, use_container_width=True)
     
-    # Display charts for each start year
+    # Summary table for each start year
     for start_year in config['start_years']:
         st.subheader(f"📈 起始年份: {start_year}")
         
-        # Rolling CAGR chart
-        chart = create_rolling_cagr_chart(rolling_results, start_year)
-        if chart:
-            st.plotly_chart(chart, use_container_width=True)
-        
         # Summary table
-        processor = st.session_state.data_processor
-        summary_df = processor.create_summary_dataframe(rolling_results, start_year)
+        summary_df = summary_dfs[start_year]
         
         if not summary_df.empty:
-            format_cols = {
-                'best_cagr': 'percentage',
-                'worst_cagr': 'percentage',
-                'avg_cagr': 'percentage',
-                'std_cagr': 'percentage',
-                'p10_cagr': 'percentage',
-                'median_cagr': 'percentage',
-                'p90_cagr': 'percentage',
-                'stability_index': 'decimal',
-                'variation_coeff': 'decimal'
-            }
-            display_analysis_table(summary_df, f"窗口统计摘要 - {start_year}", format_cols)
+            display_analysis_table(summary_df, f"窗口统计摘要 - {start_year}", _ROLLING_FMT_COLS)
         
         st.divider()
     
     # Window comparison chart
     st.subheader("📊 时间窗口比较")
-    comparison_chart = create_window_comparison_chart(rolling_results, config['start_years'])
+    comparison_chart = _cached_comparison_fig(results_hash, config['start_years'], st.session_state.analysis_results)
     st.plotly_chart(comparison_chart, use_container_width=True)
 
 
+@st.fragment
 def display_no_loss_analysis():
     """Display no-loss analysis tab."""
     if 'no_loss' not in st.session_state.analysis_results:
         show_info_message("请先运行分析", "info")
         return
     
-    no_loss_results = st.session_state.analysis_results['no_loss']
-    
     # Display chart
-    chart = create_no_loss_chart(no_loss_results)
+    chart = _cached_no_loss_fig(st.session_state.get('results_blob_hash'), st.session_state.analysis_results)
     if chart:
         st.plotly_chart(chart, use_container_width=True)
     
     # Display detailed table
-    if no_loss_results:
-        data_rows = []
-        for start_year, result in no_loss_results.items():
-            data_rows.append({
-                '起始年份': start_year,
-                '最小持有期': result['min_holding_years'],
-                '最差窗口': result['worst_window'],
-                '最差CAGR': result['worst_cagr'],
-                '最佳窗口': result['best_window'],
-                '最佳CAGR': result['best_cagr'],
-                '平均CAGR': result['average_cagr'],
-                '检查窗口数': result['num_windows_checked']
-            })
-        
-        df = pd.DataFrame(data_rows)
+    df = _cached_records_table(
+        st.session_state.get('results_blob_hash'), 'no_loss_records', st.session_state.analysis_results
+    )
+    if df is not None:
         format_cols = {
             '最差CAGR': 'percentage',
             '最佳CAGR': 'percentage',
@@ -239,30 +412,30 @@ def display_no_loss_analysis():
         display_analysis_table(df, "无损失持有期详细分析", format_cols)
 
 
-def display_convergence_analysis():
-    """Display convergence analysis tab."""
-    if 'convergence' not in st.session_state.analysis_results:
-        show_info_message("请先运行分析", "info")
-        return
-    
-    convergence_results = st.session_state.analysis_results['convergence']
-    config = st.session_state.analysis_results['config']
-    
-    # Display heatmap
-    st.subheader("🔥 收敛性热力图")
-    heatmap = create_convergence_heatmap(
-        convergence_results,
-        config['start_years'],
-        config['thresholds']
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_summary(results_blob_hash: str, thr: float, language: str, depth: str, _analysis_results: Dict[str, Any]) -> str:
+    """Summary report memoized on the results hash and report options."""
+    return generate_summary_report(
+        _analysis_results['rolling'],
+        _analysis_results['no_loss'],
+        _analysis_results['convergence'],
+        _analysis_results['config'],
+        target_threshold=thr,
+        language=language,
+        depth=depth
     )
-    st.plotly_chart(heatmap, use_container_width=True)
 
-    # AI-like summary report (local heuristic)
+
+@st.fragment
+def display_summary_report_section(config: Dict[str, Any]):
+    """Summary report controls; slider/radio/toggle changes only rerun this block."""
     with st.expander("🧠 生成综合智能总结（滚动 + 无损失 + 收敛）", expanded=False):
+        thresholds = config.get('thresholds') or [0.005]
         target_thr = st.select_slider(
             "选择目标收敛阈值（用于建议最短持有期）",
-            options=[f"{t:.2%}" for t in config['thresholds']] if config.get('thresholds') else ["0.50%"],
-            value=(f"{config['thresholds'][len(config['thresholds'])//2]:.2%}" if config.get('thresholds') else "0.50%")
+            options=thresholds,
+            format_func=lambda t: f"{t:.2%}",
+            value=thresholds[len(thresholds)//2]
         )
         granularity = st.radio("报告粒度 / Report granularity", ["简版", "标准", "详细"], index=1, horizontal=True)
         bi = st.toggle("中英双语 / Bilingual", value=st.session_state.get("bi_lang", False), key="bi_lang")
@@ -273,20 +446,14 @@ def display_convergence_analysis():
             if st.button("🗑️ 清除报告", key="clear_report"):
                 st.session_state.pop('ai_report_md', None)
         if gen_clicked:
-            # 将选择的字符串阈值转为小数
-            try:
-                thr = float(target_thr.strip('%'))/100.0
-            except Exception:
-                thr = None
+            thr = target_thr
             depth_map = {"简版": "brief", "标准": "standard", "详细": "detailed"}
-            report_md = generate_summary_report(
-                st.session_state.analysis_results['rolling'],
-                st.session_state.analysis_results['no_loss'],
-                st.session_state.analysis_results['convergence'],
-                config,
-                target_threshold=thr,
-                language='bi' if st.session_state.get("bi_lang", True) else 'zh',
-                depth=depth_map.get(granularity, 'standard')
+            report_md = _cached_summary(
+                st.session_state.get('results_blob_hash'),
+                thr,
+                'bi' if st.session_state.get("bi_lang", True) else 'zh',
+                depth_map.get(granularity, 'standard'),
+                st.session_state.analysis_results
             )
             st.session_state['ai_report_md'] = report_md
         # 始终展示已生成的报告与下载区（如有）
@@ -294,26 +461,34 @@ def display_convergence_analysis():
             st.markdown(st.session_state['ai_report_md'])
             create_download_section({'ai_report_md': st.session_state['ai_report_md']}, filename_prefix="sp500_ai_summary")
 
-    # Display detailed table
-    data_rows = []
-    for start_year in config['start_years']:
-        if start_year in convergence_results:
-            for threshold in config['thresholds']:
-                if threshold in convergence_results[start_year]:
-                    result = convergence_results[start_year][threshold]
-                    data_rows.append({
-                        '起始年份': start_year,
-                        '阈值': threshold,
-                        '最小持有期': result['min_holding_years'],
-                        '最佳窗口': result['best_window'],
-                        '最佳CAGR': result['best_cagr'],
-                        '最差窗口': result['worst_window'],
-                        '最差CAGR': result['worst_cagr'],
-                        '收益差': result['spread']
-                    })
+
+@st.fragment
+def display_convergence_analysis():
+    """Display convergence analysis tab."""
+    if 'convergence' not in st.session_state.analysis_results:
+        show_info_message("请先运行分析", "info")
+        return
     
-    if data_rows:
-        df = pd.DataFrame(data_rows)
+    config = st.session_state.analysis_results['config']
+    
+    # Display heatmap
+    st.subheader("🔥 收敛性热力图")
+    heatmap = _cached_convergence_fig(
+        st.session_state.get('results_blob_hash'),
+        config['start_years'],
+        config['thresholds'],
+        st.session_state.analysis_results
+    )
+    st.plotly_chart(heatmap, use_container_width=True)
+
+    # AI-like summary report (local heuristic)
+    display_summary_report_section(config)
+
+    # Display detailed table
+    df = _cached_records_table(
+        st.session_state.get('results_blob_hash'), 'convergence_records', st.session_state.analysis_results
+    )
+    if df is not None:
         format_cols = {
             '阈值': 'percentage',
             '最佳CAGR': 'percentage',
@@ -323,6 +498,51 @@ def display_convergence_analysis():
         display_analysis_table(df, "收敛性分析详细结果", format_cols)
 
 
+# Metric key -> column name of the risk / multi-asset tables
+_RISK_METRIC_COLUMNS = {
+    'cagr': 'CAGR',
+    'sharpe_ratio': '夏普比率',
+    'sortino_ratio': '索提诺比率',
+    'calmar_ratio': 'Calmar比率',
+    'volatility': '波动率',
+    'max_drawdown': '最大回撤',
+    'var_95': 'VaR(95%)',
+    'cvar_95': 'CVaR(95%)'
+}
+_ASSET_METRIC_COLUMNS = {
+    'cagr': 'CAGR',
+    'sharpe_ratio': '夏普比率',
+    'max_drawdown': '最大回撤',
+    'volatility': '波动率'
+}
+_ASSET_CLASS_METRIC_COLUMNS = {
+    'cagr': '平均CAGR',
+    'sharpe_ratio': '平均夏普比率',
+    'max_drawdown': '平均最大回撤',
+    'volatility': '平均波动率'
+}
+# Column display formats of those tables; values stay numeric so the browser sorts them
+_PERCENT_COLUMN = st.column_config.NumberColumn(format="percent")
+_RATIO_COLUMN = st.column_config.NumberColumn(format="%.3f")
+_METRIC_COLUMN_CONFIG = {
+    'CAGR': _PERCENT_COLUMN, '平均CAGR': _PERCENT_COLUMN,
+    '夏普比率': _RATIO_COLUMN, '平均夏普比率': _RATIO_COLUMN,
+    '索提诺比率': _RATIO_COLUMN, 'Calmar比率': _RATIO_COLUMN,
+    '波动率': _PERCENT_COLUMN, '平均波动率': _PERCENT_COLUMN,
+    '最大回撤': _PERCENT_COLUMN, '平均最大回撤': _PERCENT_COLUMN,
+    'VaR(95%)': _PERCENT_COLUMN, 'CVaR(95%)': _PERCENT_COLUMN,
+    '权重': _PERCENT_COLUMN
+}
+
+
+def _metrics_table(metrics_by_key: Dict[Any, Dict[str, Any]], column_names: Dict[str, str]):
+    """Numeric table of the selected metrics, one row per key (missing metrics are 0)."""
+    frame = pd.DataFrame.from_dict(metrics_by_key, orient='index')
+    frame = frame.reindex(columns=list(column_names)).astype('float64').fillna(0.0)
+    return frame.rename(columns=column_names).reset_index(drop=True)
+
+
+@st.fragment
 def display_risk_metrics_analysis():
     """Display risk metrics analysis tab."""
     if not st.session_state.analysis_results or 'risk_metrics' not in st.session_state.analysis_results:
@@ -361,29 +581,63 @@ def display_risk_metrics_analysis():
     # Display detailed risk metrics table
     st.subheader("📋 详细风险指标")
 
-    # Prepare data for detailed table
-    detailed_data = []
-    for start_year, year_data in risk_results.items():
-        if 'overall' in year_data and year_data['overall']:
-            metrics = year_data['overall']
-            detailed_data.append({
-                '起始年份': start_year,
-                '期间': f"{metrics.get('start_year', '')}-{metrics.get('end_year', '')}",
-                'CAGR': f"{metrics.get('cagr', 0):.2%}",
-                '夏普比率': f"{metrics.get('sharpe_ratio', 0):.3f}",
-                '索提诺比率': f"{metrics.get('sortino_ratio', 0):.3f}",
-                'Calmar比率': f"{metrics.get('calmar_ratio', 0):.3f}",
-                '波动率': f"{metrics.get('volatility', 0):.2%}",
-                '最大回撤': f"{metrics.get('max_drawdown', 0):.2%}",
-                'VaR(95%)': f"{metrics.get('var_95', 0):.2%}",
-                'CVaR(95%)': f"{metrics.get('cvar_95', 0):.2%}"
-            })
+    # Prepare data for detailed table (numeric columns, formatted by the Styler)
+    overall = {
+        start_year: year_data['overall']
+        for start_year, year_data in risk_results.items()
+        if 'overall' in year_data and year_data['overall']
+    }
+
+    if overall:
+        df = _metrics_table(overall, _RISK_METRIC_COLUMNS)
+        periods = [f"{m.get('start_year', '')}-{m.get('end_year', '')}" for m in overall.values()]
+        df.insert(0, '期间', periods)
+        df.insert(0, '起始年份', list(overall))
+        st.dataframe(df, column_config=_METRIC_COLUMN_CONFIG, use_container_width=True, height=300)
+
+
+@st.fragment
+def _multi_asset_picker(available_assets: Dict[str, List[Dict[str, Any]]]):
+    """
+    Asset selection widgets, rerun on their own when the selection changes.
+
+    The selection (SPY first) is stored in st.session_state.multi_asset_selection.
+    """
+    # Always include S&P 500 as benchmark
+    selected_assets = ['SPY']
+    st.info("📌 S&P 500 (SPY) 已自动选择作为基准")
 
-    if detailed_data:
-        df = pd.DataFrame(detailed_data)
-        st.dataframe(df, use_container_width=True, height=300)
+    # Asset class selection: one multiselect per class
+    asset_labels = {
+        asset['symbol']: f"{asset['name']} ({asset['symbol']})"
+        for assets in available_assets.values() for asset in assets
+    }
+    for asset_class, assets in available_assets.items():
+        # SPY is already selected as the benchmark
+        options = [asset for asset in assets if asset['symbol'] != 'SPY']
+        if not options:
+            continue
+
+        title = f"{asset_class.upper()} 股票指数" if asset_class == 'equity' else asset_class.upper()
+        picked = st.multiselect(
+            title,
+            options=[asset['symbol'] for asset in options],
+            format_func=asset_labels.get,
+            help="\n".join(
+                f"{asset['symbol']}: {asset['description']} | 起始年份: {asset['inception_year']}"
+                for asset in options
+            ),
+            key=f"assets_{asset_class}"
+        )
+        selected_assets.extend(picked)
 
+    if len(selected_assets) < 2:
+        st.warning("请至少选择一个额外资产进行比较分析")
 
+    st.session_state.multi_asset_selection = selected_assets
+
+
+@st.fragment
 def display_multi_asset_analysis():
     """Display multi-asset analysis tab."""
     st.subheader("🌐 多资产类别比较分析")
@@ -399,36 +653,7 @@ def display_multi_asset_analysis():
     processor = st.session_state.data_processor
     available_assets = processor.get_available_assets()
 
-    # Create asset selection interface
-    selected_assets = []
-
-    # Always include S&P 500 as benchmark
-    selected_assets.append('SPY')
-    st.info("📌 S&P 500 (SPY) 已自动选择作为基准")
-
-    # Asset class selection
-    for asset_class, assets in available_assets.items():
-        if asset_class == 'equity' and any(asset['symbol'] == 'SPY' for asset in assets):
-            # Skip SPY in equity section since it's already selected
-            other_equity_assets = [asset for asset in assets if asset['symbol'] != 'SPY']
-            if other_equity_assets:
-                st.markdown(f"**{asset_class.upper()} 股票指数**")
-                for asset in other_equity_assets:
-                    if st.checkbox(f"{asset['name']} ({asset['symbol']})",
-                                 help=f"{asset['description']} | 起始年份: {asset['inception_year']}",
-                                 key=f"asset_{asset['symbol']}"):
-                        selected_assets.append(asset['symbol'])
-        else:
-            st.markdown(f"**{asset_class.upper()}**")
-            for asset in assets:
-                if st.checkbox(f"{asset['name']} ({asset['symbol']})",
-                             help=f"{asset['description']} | 起始年份: {asset['inception_year']}",
-                             key=f"asset_{asset['symbol']}"):
-                    selected_assets.append(asset['symbol'])
-
-    if len(selected_assets) < 2:
-        st.warning("请至少选择一个额外资产进行比较分析")
-        return
+    _multi_asset_picker(available_assets)
 
     # Analysis period selection
     st.subheader("📅 分析期间")
@@ -448,6 +673,11 @@ def display_multi_asset_analysis():
 
     # Run analysis button
     if st.button("🚀 运行多资产分析", use_container_width=True):
+        selected_assets = st.session_state.get('multi_asset_selection', ['SPY'])
+        if len(selected_assets) < 2:
+            st.warning("请至少选择一个额外资产进行比较分析")
+            return
+
         try:
             # Set selected assets
             processor.set_selected_assets(selected_assets)
@@ -487,23 +717,16 @@ def display_multi_asset_results():
     st.subheader("🎯 个别资产表现")
 
     # Create performance comparison table
-    performance_data = []
-    for symbol, asset_data in results['individual_assets'].items():
-        asset_info = asset_data['asset_info']
-        metrics = asset_data['risk_metrics']
-
-        performance_data.append({
-            '资产': f"{asset_info['name']} ({symbol})",
-            '资产类别': asset_info['asset_class'],
-            'CAGR': f"{metrics.get('cagr', 0):.2%}",
-            '夏普比率': f"{metrics.get('sharpe_ratio', 0):.3f}",
-            '最大回撤': f"{metrics.get('max_drawdown', 0):.2%}",
-            '波动率': f"{metrics.get('volatility', 0):.2%}"
-        })
-
-    if performance_data:
-        df = pd.DataFrame(performance_data)
-        st.dataframe(df, use_container_width=True, height=300)
+    individual_assets = results['individual_assets']
+    if individual_assets:
+        df = _metrics_table(
+            {symbol: asset_data['risk_metrics'] for symbol, asset_data in individual_assets.items()},
+            _ASSET_METRIC_COLUMNS
+        )
+        infos = [asset_data['asset_info'] for asset_data in individual_assets.values()]
+        df.insert(0, '资产类别', [info['asset_class'] for info in infos])
+        df.insert(0, '资产', [f"{info['name']} ({symbol})" for info, symbol in zip(infos, individual_assets)])
+        st.dataframe(df, column_config=_METRIC_COLUMN_CONFIG, use_container_width=True, height=300)
 
     # Correlation analysis
     if 'correlation_matrix' in results:
@@ -512,20 +735,23 @@ def display_multi_asset_results():
         correlation_matrix = results['correlation_matrix']
 
         # Create correlation heatmap
-        import plotly.graph_objects as go
-
         fig = go.Figure(data=go.Heatmap(
             z=correlation_matrix.values,
             x=correlation_matrix.columns,
             y=correlation_matrix.index,
             colorscale='RdBu',
             zmid=0,
-            text=correlation_matrix.round(3).values,
-            texttemplate="%{text}",
-            textfont={"size": 10},
             hoverongaps=False
         ))
 
+        # Cell labels only for small matrices; N^2 text labels dominate rendering otherwise
+        if len(correlation_matrix) <= 12:
+            fig.update_traces(
+                text=correlation_matrix.round(3).values,
+                texttemplate="%{text}",
+                textfont={"size": 10}
+            )
+
         fig.update_layout(
             title="资产相关性矩阵",
             xaxis_title="资产",
@@ -539,44 +765,32 @@ def display_multi_asset_results():
         # Correlation insights
         st.markdown("**相关性洞察：**")
 
-        # Find highest and lowest correlations
-        corr_values = []
-        for i in range(len(correlation_matrix.columns)):
-            for j in range(i+1, len(correlation_matrix.columns)):
-                asset1 = correlation_matrix.columns[i]
-                asset2 = correlation_matrix.columns[j]
-                corr = correlation_matrix.iloc[i, j]
-                corr_values.append((asset1, asset2, corr))
-
-        # Sort by correlation
-        corr_values.sort(key=lambda x: abs(x[2]), reverse=True)
+        # Find highest and lowest correlations over the upper triangle
+        corr_values = correlation_matrix.to_numpy()
+        rows, cols = np.triu_indices_from(corr_values, k=1)
+        pair_corrs = corr_values[rows, cols]
+        assets = correlation_matrix.columns.to_numpy()
 
-        if corr_values:
-            highest_corr = corr_values[0]
-            lowest_corr = min(corr_values, key=lambda x: x[2])
+        if pair_corrs.size:
+            i_high = int(np.argmax(np.abs(pair_corrs)))
+            i_low = int(np.argmin(pair_corrs))
 
-            st.write(f"• 最高相关性: {highest_corr[0]} 与 {highest_corr[1]} ({highest_corr[2]:.3f})")
-            st.write(f"• 最低相关性: {lowest_corr[0]} 与 {lowest_corr[1]} ({lowest_corr[2]:.3f})")
+            st.write(f"• 最高相关性: {assets[rows[i_high]]} 与 {assets[cols[i_high]]} ({pair_corrs[i_high]:.3f})")
+            st.write(f"• 最低相关性: {assets[rows[i_low]]} 与 {assets[cols[i_low]]} ({pair_corrs[i_low]:.3f})")
 
     # Asset class summary
     if 'asset_class_summary' in results:
         st.subheader("📈 资产类别汇总")
 
-        asset_class_data = []
-        for asset_class, class_data in results['asset_class_summary'].items():
-            avg_metrics = class_data['average_metrics']
-            asset_class_data.append({
-                '资产类别': asset_class.upper(),
-                '资产数量': class_data['count'],
-                '平均CAGR': f"{avg_metrics.get('cagr', 0):.2%}",
-                '平均夏普比率': f"{avg_metrics.get('sharpe_ratio', 0):.3f}",
-                '平均最大回撤': f"{avg_metrics.get('max_drawdown', 0):.2%}",
-                '平均波动率': f"{avg_metrics.get('volatility', 0):.2%}"
-            })
-
-        if asset_class_data:
-            df = pd.DataFrame(asset_class_data)
-            st.dataframe(df, use_container_width=True)
+        class_summary = results['asset_class_summary']
+        if class_summary:
+            df = _metrics_table(
+                {asset_class: class_data['average_metrics'] for asset_class, class_data in class_summary.items()},
+                _ASSET_CLASS_METRIC_COLUMNS
+            )
+            df.insert(0, '资产数量', [class_data['count'] for class_data in class_summary.values()])
+            df.insert(0, '资产类别', [asset_class.upper() for asset_class in class_summary])
+            st.dataframe(df, column_config=_METRIC_COLUMN_CONFIG, use_container_width=True)
 
     # Efficient frontier
     if 'efficient_frontier' in results:
@@ -584,17 +798,22 @@ def display_multi_asset_results():
 
         frontier_data = results['efficient_frontier']
 
+        volatility = np.asarray(frontier_data['volatility'], dtype=np.float64)
+        returns = np.asarray(frontier_data['returns'], dtype=np.float64)
+        sharpe_ratio = np.asarray(frontier_data['sharpe_ratio'], dtype=np.float64)
+        shown = _frontier_display_indices(volatility, returns)
+
         # Create efficient frontier chart
         fig = go.Figure()
 
-        # Add scatter plot of portfolios
-        fig.add_trace(go.Scatter(
-            x=frontier_data['volatility'],
-            y=frontier_data['returns'],
+        # Add scatter plot of portfolios (WebGL)
+        fig.add_trace(go.Scattergl(
+            x=volatility[shown],
+            y=returns[shown],
             mode='markers',
             marker=dict(
                 size=6,
-                color=frontier_data['sharpe_ratio'],
+                color=sharpe_ratio[shown],
                 colorscale='Viridis',
                 showscale=True,
                 colorbar=dict(
@@ -604,16 +823,16 @@ def display_multi_asset_results():
                     thickness=15
                 )
             ),
-            text=[f"夏普比率: {sr:.3f}" for sr in frontier_data['sharpe_ratio']],
-            hovertemplate="收益率: %{y:.2%}<br>波动率: %{x:.2%}<br>%{text}<extra></extra>",
+            customdata=sharpe_ratio[shown],
+            hovertemplate="收益率: %{y:.2%}<br>波动率: %{x:.2%}<br>夏普比率: %{customdata:.3f}<extra></extra>",
             name="投资组合"
         ))
 
         # Find and highlight optimal portfolio (highest Sharpe ratio)
-        max_sharpe_idx = np.argmax(frontier_data['sharpe_ratio'])
+        max_sharpe_idx = int(np.argmax(sharpe_ratio))
         fig.add_trace(go.Scatter(
-            x=[frontier_data['volatility'][max_sharpe_idx]],
-            y=[frontier_data['returns'][max_sharpe_idx]],
+            x=[volatility[max_sharpe_idx]],
+            y=[returns[max_sharpe_idx]],
             mode='markers',
             marker=dict(size=15, color='red', symbol='star'),
             name="最优投资组合",
@@ -641,17 +860,48 @@ def display_multi_asset_results():
         optimal_weights = frontier_data['weights'][max_sharpe_idx]
         st.markdown("**最优投资组合权重：**")
 
-        weights_data = []
-        for i, symbol in enumerate(config['selected_assets']):
-            asset_name = results['individual_assets'][symbol]['asset_info']['name']
-            weight = optimal_weights[i]
-            weights_data.append({
-                '资产': f"{asset_name} ({symbol})",
-                '权重': f"{weight:.1%}"
-            })
+        weights_df = pd.DataFrame({
+            '资产': [
+                f"{results['individual_assets'][symbol]['asset_info']['name']} ({symbol})"
+                for symbol in config['selected_assets']
+            ],
+            '权重': np.asarray(optimal_weights[:len(config['selected_assets'])], dtype=np.float64)
+        })
+        st.dataframe(weights_df, column_config=_METRIC_COLUMN_CONFIG, use_container_width=True, hide_index=True)
+
+
+def _frontier_display_indices(volatility, returns, max_points: int = 5000, sample_size: int = 2000):
+    """
+    Indices of the simulated portfolios to plot on the efficient frontier.
+
+    Small sets are shown in full. Larger sets keep the upper (Pareto) frontier,
+    i.e. every portfolio with a higher return than all less volatile ones,
+    plus a fixed-seed random sample of the rest.
+    """
+    n = len(volatility)
+    if n <= max_points:
+        return np.arange(n)
+
+    order = np.argsort(volatility, kind='stable')
+    sorted_returns = returns[order]
+    running_max = np.maximum.accumulate(sorted_returns)
+    is_frontier = np.concatenate(([True], sorted_returns[1:] > running_max[:-1]))
 
-        weights_df = pd.DataFrame(weights_data)
-        st.dataframe(weights_df, use_container_width=True, hide_index=True)
+    sample = np.random.default_rng(0).choice(n, size=min(sample_size, n), replace=False)
+    return np.unique(np.concatenate((order[is_frontier], sample)))
+
+
+def _config_key(config: Dict[str, Any]) -> int:
+    """Cheap hash of the analysis configuration, used to detect sidebar changes."""
+    uploaded_file = config.get('uploaded_file')
+    return hash((
+        tuple(config['start_years']),
+        tuple(config['windows']),
+        tuple(config['thresholds']),
+        config.get('data_source'),
+        getattr(uploaded_file, 'name', None),
+        getattr(uploaded_file, 'size', None)
+    ))
 
 
 def main():
@@ -667,6 +917,7 @@ def main():
         create_header()
     except Exception as e:
         st.error(f"应用初始化失败: {e}")
+        import traceback
         st.error(f"错误详情: {traceback.format_exc()}")
         return
 
@@ -682,10 +933,10 @@ def main():
         show_env_check = False
 
     if show_env_check:
-        try:
-            import reportlab  # type: ignore
+        # 仅探测是否安装，不实际导入 reportlab
+        if importlib.util.find_spec("reportlab") is not None:
             st.sidebar.success("PDF 组件：reportlab 可用")
-        except Exception:
+        else:
             st.sidebar.warning(
                 "PDF 组件不可用：未安装 reportlab 或网络阻断。\n\n"
                 "安装建议：\n"
@@ -698,12 +949,13 @@ def main():
 
     # Check if configuration has changed
     config_changed = False
-    if 'last_config' in st.session_state:
-        if st.session_state.last_config != config:
+    config_key = _config_key(config)
+    if 'last_config_key' in st.session_state:
+        if st.session_state.last_config_key != config_key:
             config_changed = True
-            st.session_state.last_config = config
+            st.session_state.last_config_key = config_key
     else:
-        st.session_state.last_config = config
+        st.session_state.last_config_key = config_key
 
     # If config changed and we have analysis results, show warning
     if config_changed and st.session_state.analysis_results:
@@ -726,13 +978,16 @@ def main():
         # Force re-analysis button (clears cache)
         if st.button("🔄 强制重新分析", use_container_width=True, disabled=not st.session_state.data_loaded):
             st.cache_data.clear()  # Clear all cached data
-            run_analysis(config)
+            st.session_state.data_processor.clear_caches()
+            run_analysis(config, force=True)
 
         # Clear results button
         if st.button("🗑️清除结果", use_container_width=True):
             st.session_state.analysis_results = {}
             st.session_state.data_loaded = False
             st.cache_data.clear()
+            st.session_state.data_processor.clear_caches()
+            clear_cache()
             st.rerun()
     
     with col1:
@@ -780,7 +1035,6 @@ def main():
                     md = render_glossary_md()
                     st.markdown(md)
                     # 下载按钮（CSV / Markdown / PDF）
-                    import io
                     st.download_button(
                         label="下载术语表 CSV",
                         data=to_csv(),
@@ -794,23 +1048,15 @@ def main():
                         mime="text/markdown"
                     )
                     # PDF 导出（基础文本）
-                    try:
-                        from pdf_utils import render_plain_text_to_pdf
-                        plain = md.replace('#','').replace('*','').replace('`','')
-                        pdf_data = render_plain_text_to_pdf(
-                            plain,
-                            title="S&P 500 Analysis - Glossary",
-                            footer="Generated by S&P 500 Analysis UI",
-                            color_hex="#0B3B5A",
-                        )
+                    if pdf_export_available():
                         st.download_button(
                             label="下载术语表 PDF",
-                            data=pdf_data,
+                            data=markdown_to_pdf_bytes(md, "S&P 500 Analysis - Glossary"),
                             file_name="glossary.pdf",
                             mime="application/pdf"
                         )
-                    except Exception as e:
-                        st.caption(f"术语表PDF导出不可用: {e}")
+                    else:
+                        st.caption("术语表PDF导出不可用: 未安装 reportlab")
                 except Exception as e:
                     st.caption(f"无法加载术语表: {e}")
 
@@ -824,6 +1070,26 @@ def main():
     )
 
 
+@st.cache_data(show_spinner=False)
+def _available_years(data_hash: str, _data) -> List[int]:
+    """Sorted distinct years of the loaded data, memoized on the data hash."""
+    return np.unique(_data['year'].to_numpy()).tolist()
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _run_gips(data_hash: str, start_year: int, end_year: int, benchmark_symbol: str,
+              firm_name: str, composite_name: str, _processor: DataProcessor) -> Dict[str, Any]:
+    """GIPS compliance analysis memoized on the data hash and its inputs."""
+    return _processor.compute_gips_compliance_analysis(
+        start_year=start_year,
+        end_year=end_year,
+        benchmark_symbol=benchmark_symbol,
+        firm_name=firm_name,
+        composite_name=composite_name
+    )
+
+
+@st.fragment
 def display_gips_compliance_analysis():
     """Display GIPS compliance analysis interface."""
     st.header("🏛️ GIPS合规性分析")
@@ -864,23 +1130,18 @@ def display_gips_compliance_analysis():
         )
 
     with col2:
-        benchmark_options = {
-            "SPY": "SPDR S&P 500 ETF",
-            "QQQ": "Invesco QQQ Trust",
-            "IWM": "iShares Russell 2000 ETF"
-        }
-
         benchmark_symbol = st.selectbox(
             "基准指数",
-            options=list(benchmark_options.keys()),
-            format_func=lambda x: f"{x} - {benchmark_options[x]}",
+            options=BENCHMARK_LABELS,
+            format_func=BENCHMARK_FMT.get,
             help="选择用于比较的基准指数",
             key="gips_benchmark_symbol"
         )
 
         # Analysis period
-        if st.session_state.data_processor and st.session_state.data_processor.data is not None:
-            available_years = sorted(st.session_state.data_processor.data['year'].unique())
+        processor = st.session_state.data_processor
+        if processor and processor.data is not None:
+            available_years = _available_years(processor.get_data_hash(), processor.data)
         else:
             available_years = list(range(2000, 2025))
 
@@ -906,16 +1167,20 @@ def display_gips_compliance_analysis():
         try:
             with st.spinner("正在进行GIPS合规性分析..."):
                 # Run GIPS compliance analysis
-                gips_results = st.session_state.data_processor.compute_gips_compliance_analysis(
-                    start_year=start_year,
-                    end_year=end_year,
-                    benchmark_symbol=benchmark_symbol,
-                    firm_name=firm_name,
-                    composite_name=composite_name
+                processor = st.session_state.data_processor
+                gips_results = _run_gips(
+                    processor.get_data_hash(),
+                    start_year,
+                    end_year,
+                    benchmark_symbol,
+                    firm_name,
+                    composite_name,
+                    processor
                 )
 
                 # Store results in session state
                 st.session_state.gips_results = gips_results
+                st.session_state.gips_results_hash = get_results_hash(gips_results, {})
 
                 st.success("✅ GIPS合规性分析完成！")
 
@@ -929,91 +1194,95 @@ def display_gips_compliance_analysis():
         display_gips_results(st.session_state.gips_results)
 
 
-def display_gips_results(results: Dict):
-    """Display GIPS compliance analysis results."""
-    st.subheader("📊 GIPS合规性分析结果")
+# GIPS metric cards of display_gips_results, filled in with str.format_map
+_GIPS_CARD_TEMPLATE = (
+    '<div class="gips-card"><div class="gips-metric-title">{title}</div>'
+    '<div class="gips-metric-value"{value_style}>{value}</div>'
+    '<div class="gips-metric-note">{note}</div></div>'
+)
+_GIPS_STATUS_CARD_TEMPLATE = (
+    '<div class="gips-card"><div class="gips-metric-title">合规性等级</div>'
+    '<div class="gips-compliance-status {class}" style="margin: 0.5rem 0;">{icon} {text}</div>'
+    '<div class="gips-metric-note">GIPS合规性评估</div></div>'
+)
+_GIPS_COMPLIANCE_BADGES = {
+    'full_compliance': {'icon': '✅', 'text': 'Full Compliance', 'class': 'compliance-full'},
+    'partial_compliance': {'icon': '⚠️', 'text': 'Partial Compliance', 'class': 'compliance-partial'},
+    'non_compliant': {'icon': '❌', 'text': 'Non Compliance', 'class': 'compliance-none'}
+}
+_GIPS_COMPLIANCE_UNKNOWN = {'icon': '❓', 'text': 'Unknown', 'class': 'compliance-none'}
 
-    # Main performance metrics with improved styling
+
+def _format_gips_metrics(results: Dict) -> Dict[str, str]:
+    """
+    Format the numeric GIPS results shown by display_gips_results in one place.
+
+    Missing values (no money-weighted return, no risk or sector attribution)
+    come back as 'N/A', so the render code never has to branch on them.
+    """
     gips_calc = results['gips_calculation']
+    attribution = results['attribution_analysis']
+    mwr = gips_calc['money_weighted_return']
 
-    # Create a container with custom styling
-    st.markdown('<div class="gips-result-container">', unsafe_allow_html=True)
+    fmt = {
+        'twr': f"{gips_calc['time_weighted_return']:.2%}",
+        'mwr': f"{mwr:.2%}" if mwr is not None else "N/A",
+    }
 
-    col1, col2, col3, col4 = st.columns(4)
+    risk_metrics = attribution.get('risk_adjusted_metrics', {})
+    for key, spec in (('alpha', '.4f'), ('beta', '.3f'), ('portfolio_sharpe', '.3f'),
+                      ('benchmark_sharpe', '.3f'), ('information_ratio', '.3f'),
+                      ('tracking_error', '.4f'), ('excess_return', '.4f')):
+        fmt[key] = format(risk_metrics[key], spec) if key in risk_metrics else "N/A"
 
-    with col1:
-        st.markdown(
-            f"""
-            <div style="text-align: center; padding: 1rem;">
-                <div class="gips-metric-title">时间加权收益率</div>
-                <div class="gips-metric-value">{gips_calc['time_weighted_return']:.2%}</div>
-                <div style="font-size: 0.75rem; color: #64748b; margin-top: 0.25rem;">GIPS标准要求的核心指标</div>
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
+    sector_attr = attribution.get('sector_attribution', {})
+    for key in ('allocation_effect', 'selection_effect', 'interaction_effect', 'total_attribution'):
+        fmt[key] = f"{sector_attr[key]:.2%}" if key in sector_attr else "N/A"
 
-    with col2:
-        if gips_calc['money_weighted_return'] is not None:
-            st.markdown(
-                f"""
-                <div style="text-align: center; padding: 1rem;">
-                    <div class="gips-metric-title">资金加权收益率</div>
-                    <div class="gips-metric-value">{gips_calc['money_weighted_return']:.2%}</div>
-                    <div style="font-size: 0.75rem; color: #64748b; margin-top: 0.25rem;">内部收益率(IRR)</div>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
-        else:
-            st.markdown(
-                f"""
-                <div style="text-align: center; padding: 1rem;">
-                    <div class="gips-metric-title">资金加权收益率</div>
-                    <div class="gips-metric-value" style="color: #94a3b8;">N/A</div>
-                    <div style="font-size: 0.75rem; color: #64748b; margin-top: 0.25rem;">计算失败或不适用</div>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
+    return fmt
 
-    with col3:
-        compliance_level = gips_calc['compliance_level']
-        compliance_config = {
-            'full_compliance': {'icon': '✅', 'text': 'Full Compliance', 'class': 'compliance-full'},
-            'partial_compliance': {'icon': '⚠️', 'text': 'Partial Compliance', 'class': 'compliance-partial'},
-            'non_compliant': {'icon': '❌', 'text': 'Non Compliance', 'class': 'compliance-none'}
-        }
 
-        config = compliance_config.get(compliance_level, {'icon': '❓', 'text': 'Unknown', 'class': 'compliance-none'})
-
-        st.markdown(
-            f"""
-            <div style="text-align: center; padding: 1rem;">
-                <div class="gips-metric-title">合规性等级</div>
-                <div class="gips-compliance-status {config['class']}" style="margin: 0.5rem 0;">
-                    {config['icon']} {config['text']}
-                </div>
-                <div style="font-size: 0.75rem; color: #64748b;">GIPS合规性评估</div>
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
+@st.fragment
+def display_gips_results(results: Dict):
+    """
+    Display GIPS compliance analysis results.
 
-    with col4:
-        period_summary = results['period_summary']
-        st.markdown(
-            f"""
-            <div style="text-align: center; padding: 1rem;">
-                <div class="gips-metric-title">分析期间</div>
-                <div class="gips-metric-value" style="font-size: 1.25rem; line-height: 1.3;">{period_summary['start_date']} 至 {period_summary['end_date']}</div>
-                <div style="font-size: 0.75rem; color: #64748b; margin-top: 0.25rem;">GIPS分析时间范围</div>
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
+    Runs as its own fragment inside the GIPS tab, so the report button and
+    download only rerun this block, not the parameter widgets above it.
+    """
+
+    st.subheader("📊 GIPS合规性分析结果")
+
+    # Main performance metrics with improved styling
+    gips_calc = results['gips_calculation']
+    fmt = _format_gips_metrics(results)
 
-    st.markdown('</div>', unsafe_allow_html=True)
+    # Metric cards, rendered as one HTML block laid out by the .gips-grid CSS grid
+    if gips_calc['money_weighted_return'] is not None:
+        mwr_card = {'title': "资金加权收益率", 'value_style': '',
+                    'value': fmt['mwr'], 'note': "内部收益率(IRR)"}
+    else:
+        mwr_card = {'title': "资金加权收益率", 'value_style': ' style="color: #94a3b8;"',
+                    'value': "N/A", 'note': "计算失败或不适用"}
+
+    badge = _GIPS_COMPLIANCE_BADGES.get(gips_calc['compliance_level'], _GIPS_COMPLIANCE_UNKNOWN)
+    period_summary = results['period_summary']
+
+    cards = (
+        _GIPS_CARD_TEMPLATE.format_map({
+            'title': "时间加权收益率", 'value_style': '',
+            'value': fmt['twr'], 'note': "GIPS标准要求的核心指标"}),
+        _GIPS_CARD_TEMPLATE.format_map(mwr_card),
+        _GIPS_STATUS_CARD_TEMPLATE.format_map(badge),
+        _GIPS_CARD_TEMPLATE.format_map({
+            'title': "分析期间", 'value_style': ' style="font-size: 1.25rem; line-height: 1.3;"',
+            'value': f"{period_summary['start_date']} 至 {period_summary['end_date']}",
+            'note': "GIPS分析时间范围"}),
+    )
+    st.markdown(
+        '<div class="gips-result-container"><div class="gips-grid">' + "".join(cards) + '</div></div>',
+        unsafe_allow_html=True
+    )
 
     # Compliance report
     st.subheader("📋 合规性报告")
@@ -1055,52 +1324,35 @@ def display_gips_results(results: Dict):
     attribution = results['attribution_analysis']
 
     if 'risk_adjusted_metrics' in attribution:
-        risk_metrics = attribution['risk_adjusted_metrics']
-
         col1, col2 = st.columns(2)
 
         with col1:
             st.markdown("**风险调整指标**")
 
-            metrics_data = {
-                "指标": ["Alpha", "Beta", "夏普比率", "信息比率", "跟踪误差", "超额收益"],
-                "投资组合": [
-                    f"{risk_metrics['alpha']:.4f}",
-                    f"{risk_metrics['beta']:.3f}",
-                    f"{risk_metrics['portfolio_sharpe']:.3f}",
-                    f"{risk_metrics['information_ratio']:.3f}",
-                    f"{risk_metrics['tracking_error']:.4f}",
-                    f"{risk_metrics['excess_return']:.4f}"
-                ],
-                "基准": [
-                    "0.0000",
-                    "1.000",
-                    f"{risk_metrics['benchmark_sharpe']:.3f}",
-                    "0.000",
-                    "0.0000",
-                    "0.0000"
-                ]
-            }
+            metrics_rows = [
+                {"指标": "Alpha", "投资组合": fmt['alpha'], "基准": "0.0000"},
+                {"指标": "Beta", "投资组合": fmt['beta'], "基准": "1.000"},
+                {"指标": "夏普比率", "投资组合": fmt['portfolio_sharpe'], "基准": fmt['benchmark_sharpe']},
+                {"指标": "信息比率", "投资组合": fmt['information_ratio'], "基准": "0.000"},
+                {"指标": "跟踪误差", "投资组合": fmt['tracking_error'], "基准": "0.0000"},
+                {"指标": "超额收益", "投资组合": fmt['excess_return'], "基准": "0.0000"},
+            ]
 
-            st.dataframe(pd.DataFrame(metrics_data), use_container_width=True)
+            # 小型固定结构表格，直接用行字典渲染，无需构建DataFrame
+            st.table(metrics_rows)
 
         with col2:
             if 'sector_attribution' in attribution:
                 st.markdown("**行业归因分析**")
 
-                sector_attr = attribution['sector_attribution']
-
-                attribution_data = {
-                    "归因组件": ["配置效应", "选择效应", "交互效应", "总归因"],
-                    "贡献 (%)": [
-                        f"{sector_attr['allocation_effect']:.2%}",
-                        f"{sector_attr['selection_effect']:.2%}",
-                        f"{sector_attr['interaction_effect']:.2%}",
-                        f"{sector_attr['total_attribution']:.2%}"
-                    ]
-                }
+                attribution_rows = [
+                    {"归因组件": "配置效应", "贡献 (%)": fmt['allocation_effect']},
+                    {"归因组件": "选择效应", "贡献 (%)": fmt['selection_effect']},
+                    {"归因组件": "交互效应", "贡献 (%)": fmt['interaction_effect']},
+                    {"归因组件": "总归因", "贡献 (%)": fmt['total_attribution']},
+                ]
 
-                st.dataframe(pd.DataFrame(attribution_data), use_container_width=True)
+                st.table(attribution_rows)
 
     # Benchmark validation
     st.subheader("🎯 基准验证")
@@ -1128,23 +1380,20 @@ def display_gips_results(results: Dict):
         portfolio_chars = benchmark_validation['portfolio_characteristics']
         benchmark_chars = benchmark_validation['benchmark_characteristics']
 
-        comparison_data = {
-            "特征": ["资产类别", "地理区域", "投资风格", "市值重点"],
-            "投资组合": [
-                portfolio_chars.get('asset_class', 'N/A'),
-                portfolio_chars.get('geography', 'N/A'),
-                portfolio_chars.get('investment_style', 'N/A'),
-                portfolio_chars.get('market_cap_focus', 'N/A')
-            ],
-            "基准": [
-                benchmark_chars.get('asset_class', 'N/A'),
-                benchmark_chars.get('geography', 'N/A'),
-                benchmark_chars.get('investment_style', 'N/A'),
-                benchmark_chars.get('market_cap_focus', 'N/A')
-            ]
-        }
-
-        st.dataframe(pd.DataFrame(comparison_data), use_container_width=True)
+        characteristics = [
+            ("资产类别", 'asset_class'),
+            ("地理区域", 'geography'),
+            ("投资风格", 'investment_style'),
+            ("市值重点", 'market_cap_focus'),
+        ]
+        comparison_rows = [
+            {"特征": label,
+             "投资组合": portfolio_chars.get(key, 'N/A'),
+             "基准": benchmark_chars.get(key, 'N/A')}
+            for label, key in characteristics
+        ]
+
+        st.table(comparison_rows)
 
     # GIPS compliance statement
     st.subheader("📜 GIPS合规性声明")
@@ -1159,85 +1408,107 @@ def display_gips_results(results: Dict):
     # Download report option
     st.subheader("📥 报告下载")
 
-    if st.button("📄 生成详细报告"):
-        # Generate comprehensive report
-        report_content = generate_gips_report_content(results)
+    # The report is only built after this click. Its body is memoized on the
+    # content hash of the results; the generation time is stamped outside the
+    # cache. on_click="ignore" keeps the download button from rerunning the
+    # page, so it stays visible after the download.
+    if st.button("📄 生成详细报告", key="gips_generate_report"):
+        results_hash = st.session_state.get('gips_results_hash') or get_results_hash(results, {})
+        report = _gips_report_title(datetime.now()) + _cached_gips_report_body(results_hash, results)
 
         st.download_button(
-            label="下载GIPS合规性报告",
-            data=report_content,
+            label="📄 下载GIPS合规性报告",
+            data=report.encode("utf-8"),
             file_name=f"GIPS_Compliance_Report_{compliance_report['composite_name'].replace(' ', '_')}.txt",
-            mime="text/plain"
+            mime="text/plain",
+            on_click="ignore"
         )
 
 
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_gips_report_body(results_hash: str, _results: Dict) -> str:
+    """GIPS report body memoized on the content hash of the GIPS results."""
+    return _gips_report_body(_results)
+
+
 def generate_gips_report_content(results: Dict) -> str:
     """Generate comprehensive GIPS compliance report content."""
+    return _gips_report_title(datetime.now()) + _gips_report_body(results)
+
+
+def _gips_report_title(generated_at: datetime) -> str:
+    """Report banner and generation time."""
+    banner = "=" * 80 + "\n"
+    return (
+        f"{banner}"
+        "GIPS合规性分析报告\n"
+        "Global Investment Performance Standards Compliance Report\n"
+        f"{banner}"
+        "\n"
+        f"报告生成时间: {generated_at.strftime('%Y-%m-%d %H:%M:%S')}\n"
+        "\n"
+    )
+
+
+def _gips_report_body(results: Dict) -> str:
+    """Report sections, from the basic information on; independent of the time."""
+    from io import StringIO
+
     gips_calc = results['gips_calculation']
     compliance_report = results['compliance_report']
     attribution = results['attribution_analysis']
-    benchmark_validation = results['benchmark_validation']
 
-    report_lines = [
-        "=" * 80,
-        "GIPS合规性分析报告",
-        "Global Investment Performance Standards Compliance Report",
-        "=" * 80,
-        "",
-        f"报告生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-        "",
-        "基本信息",
-        "-" * 40,
-        f"投资公司: {compliance_report['firm_name']}",
-        f"投资组合: {compliance_report['composite_name']}",
-        f"分析期间: {compliance_report['period_start']} 至 {compliance_report['period_end']}",
-        f"基准指数: {compliance_report.get('benchmark_name', 'N/A')}",
-        "",
-        "表现指标",
-        "-" * 40,
-        f"时间加权收益率: {compliance_report['time_weighted_return']}",
-        f"基准收益率: {compliance_report.get('benchmark_return', 'N/A')}",
-        f"超额收益: {compliance_report.get('excess_return', 'N/A')}",
-        f"计算方法: {compliance_report['calculation_method']}",
-        "",
-        "合规性评估",
-        "-" * 40,
-        f"合规性等级: {gips_calc['compliance_level']}",
-        ""
-    ]
+    rule = "-" * 40 + "\n"
+    banner = "=" * 80 + "\n"
+
+    buf = StringIO()
+    w = buf.write
+
+    w("基本信息\n")
+    w(rule)
+    w(f"投资公司: {compliance_report['firm_name']}\n")
+    w(f"投资组合: {compliance_report['composite_name']}\n")
+    w(f"分析期间: {compliance_report['period_start']} 至 {compliance_report['period_end']}\n")
+    w(f"基准指数: {compliance_report.get('benchmark_name', 'N/A')}\n")
+    w("\n")
+    w("表现指标\n")
+    w(rule)
+    w(f"时间加权收益率: {compliance_report['time_weighted_return']}\n")
+    w(f"基准收益率: {compliance_report.get('benchmark_return', 'N/A')}\n")
+    w(f"超额收益: {compliance_report.get('excess_return', 'N/A')}\n")
+    w(f"计算方法: {compliance_report['calculation_method']}\n")
+    w("\n")
+    w("合规性评估\n")
+    w(rule)
+    w(f"合规性等级: {gips_calc['compliance_level']}\n")
+    w("\n")
 
     if gips_calc['validation_notes']:
-        report_lines.extend([
-            "验证说明:",
-            *[f"• {note}" for note in gips_calc['validation_notes']],
-            ""
-        ])
+        w("验证说明:\n")
+        buf.writelines(f"• {note}\n" for note in gips_calc['validation_notes'])
+        w("\n")
 
     # Add attribution analysis
     if 'risk_adjusted_metrics' in attribution:
-        risk_metrics = attribution['risk_adjusted_metrics']
-        report_lines.extend([
-            "风险调整指标",
-            "-" * 40,
-            f"Alpha: {risk_metrics['alpha']:.4f}",
-            f"Beta: {risk_metrics['beta']:.3f}",
-            f"夏普比率: {risk_metrics['portfolio_sharpe']:.3f}",
-            f"信息比率: {risk_metrics['information_ratio']:.3f}",
-            f"跟踪误差: {risk_metrics['tracking_error']:.4f}",
-            ""
-        ])
+        fmt = _format_gips_metrics(results)
+        w("风险调整指标\n")
+        w(rule)
+        w(f"Alpha: {fmt['alpha']}\n")
+        w(f"Beta: {fmt['beta']}\n")
+        w(f"夏普比率: {fmt['portfolio_sharpe']}\n")
+        w(f"信息比率: {fmt['information_ratio']}\n")
+        w(f"跟踪误差: {fmt['tracking_error']}\n")
+        w("\n")
 
     # Add compliance statement
-    report_lines.extend([
-        "GIPS合规性声明",
-        "-" * 40,
-        compliance_report.get('compliance_statement', ''),
-        "",
-        "=" * 80,
-        "报告结束"
-    ])
-
-    return "\n".join(report_lines)
+    w("GIPS合规性声明\n")
+    w(rule)
+    w(f"{compliance_report.get('compliance_statement', '')}\n")
+    w("\n")
+    w(banner)
+    w("报告结束")
+
+    return buf.getvalue()
 
 
 if __name__ == "__main__":
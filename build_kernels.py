@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Ahead-of-time compile the analytics kernels with numba.pycc.
+
+Produces an ``sp500_kernels`` extension module next to this file. When it is
+present, analytics_kernels uses the precompiled functions and the first
+analysis in a fresh Streamlit process skips the numba JIT warm-up. Without it
+the @njit (cache=True) versions are used as before.
+
+Re-run the build after changing a kernel in analytics_kernels, otherwise the
+stale extension module keeps being imported.
+
+Usage:
+    python build_kernels.py
+"""
+
+import os
+import sys
+
+from numba.pycc import CC
+
+import analytics_kernels
+
+
+def _python_function(kernel):
+    """Return the undecorated Python function behind an @njit kernel."""
+    return getattr(kernel, 'py_func', kernel)
+
+
+def build(output_dir: str = None) -> None:
+    """Compile the kernels into the sp500_kernels extension module."""
+    cc = CC('sp500_kernels')
+    cc.output_dir = output_dir or os.path.dirname(os.path.abspath(__file__))
+    cc.verbose = True
+
+    cc.export('rolling_cagr', 'f8[:](f8[:], i8)')(
+        _python_function(analytics_kernels.JIT_KERNELS['rolling_cagr'])
+    )
+    cc.export('horizon_extremes', 'Tuple((f8[:], f8[:], i8[:], i8[:], f8[:]))(f8[:])')(
+        _python_function(analytics_kernels.JIT_KERNELS['horizon_extremes'])
+    )
+    cc.export('rolling_risk_metrics', 'UniTuple(f8[:], 9)(f8[:], f8[:], i8)')(
+        _python_function(analytics_kernels.JIT_KERNELS['rolling_risk_metrics'])
+    )
+
+    cc.compile()
+
+
+if __name__ == "__main__":
+    build(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -51,6 +51,8 @@ CHART_CONFIG = {
     'plot_bgcolor': 'white',
     'gridcolor': '#E5E7EB',
     'zerolinecolor': '#CBD5E1',
+    # 时间线图最多绘制的点数（超过时用LTTB降采样）
+    'max_points': 2000,
 }
 
 # Data Display Configuration
@@ -75,6 +77,22 @@ ANALYSIS_CONFIG = {
     'percentage_format': '{:.2%}'
 }
 
+# Disk cache for analysis results
+CACHE_CONFIG = {
+    'cache_dir': '.cache',
+    # Bump when the analysis kernels change so stale results are not reused
+    'cache_version': 2
+}
+
+# GIPS benchmark choices (symbol -> name) and their selectbox labels
+BENCHMARK_OPTIONS = {
+    "SPY": "SPDR S&P 500 ETF",
+    "QQQ": "Invesco QQQ Trust",
+    "IWM": "iShares Russell 2000 ETF"
+}
+BENCHMARK_LABELS = tuple(BENCHMARK_OPTIONS.keys())
+BENCHMARK_FMT = {symbol: f"{symbol} - {name}" for symbol, name in BENCHMARK_OPTIONS.items()}
+
 # Footer
 FOOTER_TEXT = "S&P 500 Rolling Returns and Convergence Analysis Tool<br/>Data Engineer, 2025"
 
@@ -110,19 +128,25 @@ HELP_TEXT = {
 # CSS Styles
 CUSTOM_CSS = """
 <style>
+    /* 字体栈（各处通过 var() 引用） */
+    :root {
+        --app-font: -apple-system, BlinkMacSystemFont, "Segoe UI", "PingFang SC", "Hiragino Sans GB", "Microsoft YaHei", "Helvetica Neue", Helvetica, Arial, sans-serif;
+        --mono-font: "SF Mono", "Monaco", "Inconsolata", "Roboto Mono", "Source Code Pro", monospace;
+    }
+
     /* 全局字体设置 */
     .stApp {
-        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", "PingFang SC", "Hiragino Sans GB", "Microsoft YaHei", "Helvetica Neue", Helvetica, Arial, sans-serif;
+        font-family: var(--app-font);
     }
 
     /* 中文字体优化 */
     .stMarkdown, .stText, .stSelectbox, .stTextInput {
-        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", "PingFang SC", "Hiragino Sans GB", "Microsoft YaHei", "Helvetica Neue", Helvetica, Arial, sans-serif;
+        font-family: var(--app-font);
     }
 
     /* 数字和百分比字体优化 */
     .metric-value {
-        font-family: "SF Mono", "Monaco", "Inconsolata", "Roboto Mono", "Source Code Pro", monospace;
+        font-family: var(--mono-font);
         font-weight: 600;
         font-size: 1.5rem;
         line-height: 1.2;
@@ -130,7 +154,7 @@ CUSTOM_CSS = """
 
     /* 标题字体优化 */
     h1, h2, h3, h4, h5, h6 {
-        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", "PingFang SC", "Hiragino Sans GB", "Microsoft YaHei", "Helvetica Neue", Helvetica, Arial, sans-serif;
+        font-family: var(--app-font);
         font-weight: 600;
         line-height: 1.3;
     }
@@ -142,7 +166,7 @@ CUSTOM_CSS = """
         color: white;
         text-align: center;
         margin-bottom: 2rem;
-        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", "PingFang SC", "Hiragino Sans GB", "Microsoft YaHei", "Helvetica Neue", Helvetica, Arial, sans-serif;
+        font-family: var(--app-font);
     }
 
     .metric-card {
@@ -152,7 +176,7 @@ CUSTOM_CSS = """
         box-shadow: 0 2px 6px rgba(15, 23, 42, 0.08);
         border-left: 4px solid #0B3B5A;
         margin-bottom: 1rem;
-        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", "PingFang SC", "Hiragino Sans GB", "Microsoft YaHei", "Helvetica Neue", Helvetica, Arial, sans-serif;
+        font-family: var(--app-font);
     }
 
     /* GIPS合规性分析结果样式 */
@@ -164,8 +188,25 @@ CUSTOM_CSS = """
         margin: 1rem 0;
     }
 
+    .gips-grid {
+        display: grid;
+        grid-template-columns: repeat(4, 1fr);
+        gap: 1rem;
+    }
+
+    .gips-card {
+        text-align: center;
+        padding: 1rem;
+    }
+
+    .gips-metric-note {
+        font-size: 0.75rem;
+        color: #64748b;
+        margin-top: 0.25rem;
+    }
+
     .gips-metric-title {
-        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", "PingFang SC", "Hiragino Sans GB", "Microsoft YaHei", "Helvetica Neue", Helvetica, Arial, sans-serif;
+        font-family: var(--app-font);
         font-size: 0.875rem;
         font-weight: 500;
         color: #64748b;
@@ -175,7 +216,7 @@ CUSTOM_CSS = """
     }
 
     .gips-metric-value {
-        font-family: "SF Mono", "Monaco", "Inconsolata", "Roboto Mono", "Source Code Pro", monospace;
+        font-family: var(--mono-font);
         font-size: 1.875rem;
         font-weight: 700;
         color: #1e293b;
@@ -184,7 +225,7 @@ CUSTOM_CSS = """
     }
 
     .gips-compliance-status {
-        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", "PingFang SC", "Hiragino Sans GB", "Microsoft YaHei", "Helvetica Neue", Helvetica, Arial, sans-serif;
+        font-family: var(--app-font);
         font-size: 1.125rem;
         font-weight: 600;
         padding: 0.5rem 1rem;
@@ -239,25 +280,25 @@ CUSTOM_CSS = """
     
     /* Streamlit组件字体优化 */
     .stMetric {
-        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", "PingFang SC", "Hiragino Sans GB", "Microsoft YaHei", "Helvetica Neue", Helvetica, Arial, sans-serif;
+        font-family: var(--app-font);
     }
 
     .stMetric > div > div > div {
-        font-family: "SF Mono", "Monaco", "Inconsolata", "Roboto Mono", "Source Code Pro", monospace;
+        font-family: var(--mono-font);
         font-weight: 600;
     }
 
     .stSelectbox > div > div > div {
-        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", "PingFang SC", "Hiragino Sans GB", "Microsoft YaHei", "Helvetica Neue", Helvetica, Arial, sans-serif;
+        font-family: var(--app-font);
     }
 
     .stTextInput > div > div > input {
-        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", "PingFang SC", "Hiragino Sans GB", "Microsoft YaHei", "Helvetica Neue", Helvetica, Arial, sans-serif;
+        font-family: var(--app-font);
     }
 
     /* 表格字体优化 */
     .stDataFrame {
-        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", "PingFang SC", "Hiragino Sans GB", "Microsoft YaHei", "Helvetica Neue", Helvetica, Arial, sans-serif;
+        font-family: var(--app-font);
     }
 
     .stDataFrame table {
@@ -281,7 +322,7 @@ CUSTOM_CSS = """
         border-radius: 8px 8px 0 0;
         border: 1px solid #E5E7EB;
         border-bottom: none;
-        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", "PingFang SC", "Hiragino Sans GB", "Microsoft YaHei", "Helvetica Neue", Helvetica, Arial, sans-serif;
+        font-family: var(--app-font);
         font-weight: 500;
     }
 
@@ -6,12 +6,16 @@ import pandas as pd
 import numpy as np
 import requests
 import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional, Any
 import streamlit as st
 from sp500_convergence import SP500Analyzer, download_slickcharts_data, load_local_csv
+from analytics_kernels import rolling_cagr, horizon_extremes, log_return_prefix, rolling_risk_metrics
+from risk_metrics import calculate_rolling_risk_metrics, RISK_FREE_RATE_DEFAULT
 from config import ANALYSIS_CONFIG, MESSAGES
-from report_generator import generate_comprehensive_report, ChartExporter
 from multi_asset_engine import MultiAssetAnalyzer, ASSET_UNIVERSE
 from gips_compliance import (
     GIPSCalculator, PerformanceAttributionAnalyzer, BenchmarkStandardizer,
@@ -20,13 +24,78 @@ from gips_compliance import (
 )
 
 
+# Columns of the no-loss / convergence detail records, in table order
+NO_LOSS_RECORD_COLUMNS = [
+    'start_year_series', 'min_holding_years', 'worst_window', 'worst_cagr',
+    'best_window', 'best_cagr', 'average_cagr', 'num_windows_checked'
+]
+CONVERGENCE_RECORD_COLUMNS = [
+    'start_year_series', 'threshold', 'min_holding_years', 'best_window',
+    'best_cagr', 'worst_window', 'worst_cagr', 'spread'
+]
+# Per-window metrics returned by analytics_kernels.rolling_risk_metrics, in order
+RISK_METRIC_NAMES = [
+    'sharpe_ratio', 'sortino_ratio', 'calmar_ratio', 'volatility', 'max_drawdown',
+    'var_95', 'cvar_95', 'var_99', 'cvar_99'
+]
+# Characteristics of the simulated S&P 500 composite and of the selectable
+# GIPS benchmarks, used by _validate_benchmark_selection (read-only)
+GIPS_PORTFOLIO_CHARACTERISTICS = {
+    "asset_class": "equity",
+    "geography": "US",
+    "investment_style": "large_cap_blend",
+    "market_cap_focus": "large_cap"
+}
+BENCHMARK_CHARACTERISTICS = {
+    "SPY": {
+        "asset_class": "equity",
+        "geography": "US",
+        "investment_style": "large_cap_blend",
+        "market_cap_focus": "large_cap"
+    },
+    "QQQ": {
+        "asset_class": "equity",
+        "geography": "US",
+        "investment_style": "large_cap_growth",
+        "market_cap_focus": "large_cap"
+    },
+    "IWM": {
+        "asset_class": "equity",
+        "geography": "US",
+        "investment_style": "small_cap_blend",
+        "market_cap_focus": "small_cap"
+    }
+}
+UNKNOWN_BENCHMARK_CHARACTERISTICS = {
+    "asset_class": "unknown",
+    "geography": "unknown",
+    "investment_style": "unknown"
+}
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def _build_analyzer(data_hash: str, _data: pd.DataFrame) -> SP500Analyzer:
+    """SP500Analyzer for one data content, shared by all sessions and reruns."""
+    return SP500Analyzer(_data)
+
+
 class DataProcessor:
     """Wrapper class for data processing and analysis operations."""
 
     def __init__(self):
         self.data = None
         self.analyzer = None
+        self.returns_np = None
+        self.years_np = None
+        # Content hash of the loaded data, computed once in set_data
+        self._data_hash = "no_data"
+        # (data_hash, cumulative log-return prefix) - see _cached_logret_prefix
+        self._logret_prefix = None
         self.analysis_results = {}
+        # (start_year, window) / start_year / (start_year, threshold) results of compute_all_analyses
+        self._tuple_cache = {}
+        # Guards _tuple_cache; re-entrant so a locked caller can call back in
+        self._tuple_cache_lock = threading.RLock()
 
         # Multi-asset analysis support
         self.multi_asset_analyzer = MultiAssetAnalyzer()
@@ -53,22 +122,8 @@ class DataProcessor:
         """Load and parse CSV data from uploaded file."""
         try:
             with st.spinner(MESSAGES['processing_data']):
-                # Save uploaded file temporarily
-                import tempfile
-                import os
-
-                with tempfile.NamedTemporaryFile(mode='wb', suffix='.csv', delete=False) as tmp_file:
-                    tmp_file.write(uploaded_file.getvalue())
-                    tmp_path = tmp_file.name
-
-                try:
-                    # Use the existing load_local_csv function
-                    data = load_local_csv(tmp_path)
-                    return data
-                finally:
-                    # Clean up temporary file
-                    if os.path.exists(tmp_path):
-                        os.unlink(tmp_path)
+                # Parse the uploaded bytes in memory, no temporary file needed
+                return load_local_csv(io.BytesIO(uploaded_file.getvalue()))
 
         except Exception as e:
             st.error(f"解析CSV文件失败: {str(e)}")
@@ -96,130 +151,465 @@ class DataProcessor:
         if not self.validate_data(data):
             return False
         
+        # Years fit in int16; returns stay float64 for the statistics. The data
+        # hash is taken over float64 values, so it does not depend on the dtype.
+        data = data.assign(year=data['year'].astype(np.int16))
         self.data = data
-        self.analyzer = SP500Analyzer(data)
+        # Hash the year-sorted content first so reruns and re-uploads of the
+        # same data reuse the cached analyzer instead of rebuilding it
+        data_hash = self._compute_data_hash(data.sort_values('year'))
+        self.analyzer = _build_analyzer(data_hash, data)
+        # Year-sorted year/return columns as plain arrays; the numerical paths
+        # use these, self.data is kept for display
+        self.returns_np = self.analyzer.data['return'].to_numpy(dtype=np.float64)
+        self.years_np = self.analyzer.data['year'].to_numpy(dtype=np.int64)
+        if data_hash != self._data_hash:
+            self.clear_caches()
+        self._data_hash = data_hash
+        # Shared by the rolling, no-loss, convergence, risk and GIPS paths
+        self._logret_prefix = (data_hash, log_return_prefix(self.returns_np))
         st.success(MESSAGES['data_loaded'])
         return True
 
+    def clear_caches(self) -> None:
+        """
+        Drop the cached analysis results.
+
+        compute_all_analyses keeps its per-tuple results in this instance's
+        _tuple_cache, keyed by get_data_hash(), so a hit only assembles dicts
+        instead of going through Streamlit's argument hashing; the other
+        compute_* methods are views over it. Their data_hash argument is kept
+        for compatibility. Results are shared by reference and must be treated
+        as read-only. st.cache_data.clear() does not reach them.
+        """
+        with self._tuple_cache_lock:
+            self._tuple_cache = {}
+
+    def _cached_logret_prefix(self) -> np.ndarray:
+        """Cumulative log-return prefix sum of the loaded data, computed once per data hash."""
+        data_hash = self.get_data_hash()
+        if self._logret_prefix is None or self._logret_prefix[0] != data_hash:
+            self._logret_prefix = (data_hash, log_return_prefix(self.returns_np))
+        return self._logret_prefix[1]
+
+    @staticmethod
+    def _compute_data_hash(data: pd.DataFrame) -> str:
+        """
+        Hash the full year/return content of a DataFrame.
+
+        The raw bytes of the float64 year/return matrix are hashed with
+        blake2b, so no text formatting or serialization step is involved.
+        """
+        import hashlib
+
+        values = np.ascontiguousarray(data[['year', 'return']].to_numpy(dtype=np.float64))
+        return hashlib.blake2b(values.tobytes(), digest_size=8).hexdigest()
+
     def get_data_hash(self) -> str:
-        """Generate a hash of the current data for cache invalidation."""
+        """Hash of the current data for cache invalidation (computed once in set_data)."""
         if self.data is None:
             return "no_data"
-
-        # Create a hash based on data content
-        import hashlib
-        data_str = f"{len(self.data)}_{self.data['year'].min()}_{self.data['year'].max()}_{self.data['return'].sum():.6f}"
-        return hashlib.md5(data_str.encode()).hexdigest()[:8]
+        return self._data_hash
 
     def get_data_summary(self) -> Dict[str, Any]:
         """Get summary statistics of the loaded data."""
         if self.data is None:
             return {}
         
+        # years_np is sorted, so its ends are the first and last year
+        returns = self.returns_np
+        # Negative / zero / positive year counts from one sign pass
+        negative_years, _, positive_years = np.bincount(
+            (np.sign(returns) + 1).astype(np.intp), minlength=3
+        )
         return {
-            'total_years': len(self.data),
-            'start_year': int(self.data['year'].min()),
-            'end_year': int(self.data['year'].max()),
-            'mean_return': float(self.data['return'].mean()),
-            'std_return': float(self.data['return'].std()),
-            'min_return': float(self.data['return'].min()),
-            'max_return': float(self.data['return'].max()),
-            'positive_years': int((self.data['return'] > 0).sum()),
-            'negative_years': int((self.data['return'] < 0).sum())
+            'total_years': int(returns.size),
+            'start_year': int(self.years_np[0]),
+            'end_year': int(self.years_np[-1]),
+            'mean_return': float(returns.mean()),
+            'std_return': float(returns.std(ddof=1)),
+            'min_return': float(returns.min()),
+            'max_return': float(returns.max()),
+            'positive_years': int(positive_years),
+            'negative_years': int(negative_years)
         }
     
-    @st.cache_data
-    def compute_rolling_analysis(_self, start_years: List[int], windows: List[int], data_hash: str = None) -> Dict[str, Any]:
-        """Compute rolling CAGR analysis for all combinations."""
-        if _self.analyzer is None:
-            return {}
-        
-        results = {}
-        
-        with st.spinner(MESSAGES['processing_data']):
-            for start_year in start_years:
-                results[start_year] = {}
-                
-                for window in windows:
-                    cagrs = _self.analyzer.compute_rolling_cagr(window, start_year)
-                    if cagrs:
-                        cagr_values = [cagr for _, cagr in cagrs]
-                        end_years = [end_year for end_year, _ in cagrs]
-                        
-                        results[start_year][window] = {
-                            'cagrs': cagr_values,
-                            'end_years': end_years,
-                            'best_cagr': max(cagr_values),
-                            'worst_cagr': min(cagr_values),
-                            'avg_cagr': np.mean(cagr_values),
-                            'std_cagr': np.std(cagr_values),
-                            'count': len(cagr_values)
-                        }
-                    else:
-                        results[start_year][window] = None
-        
-        return results
-    
-    @st.cache_data
-    def compute_no_loss_analysis(_self, start_years: List[int], data_hash: str = None) -> Dict[str, Any]:
-        """Compute no-loss horizon analysis."""
-        if _self.analyzer is None:
+    def compute_rolling_analysis(self, start_years: List[int], windows: List[int], data_hash: str = None) -> Dict[str, Any]:
+        """Compute rolling CAGR analysis for all combinations (view over compute_all_analyses)."""
+        return self.compute_all_analyses(
+            start_years, windows, [], data_hash, include_no_loss=False, include_risk=False
+        ).get('rolling', {})
+
+    def _get_start_index(self, start_year: int) -> Optional[int]:
+        """Return the position of start_year in the analyzer series, or None."""
+        idx = int(np.searchsorted(self.years_np, start_year, side='left'))
+        if idx < self.years_np.size and self.years_np[idx] == start_year:
+            return idx
+        return None
+
+    def _rolling_window_stats(self, start_idx: Optional[int], window: int,
+                              log_prefix: Optional[np.ndarray] = None) -> Optional[Dict[str, Any]]:
+        """Rolling CAGR series and statistics for one start index and window."""
+        if start_idx is None:
+            return None
+
+        if log_prefix is None:
+            log_prefix = self._cached_logret_prefix()
+        cagr_array = rolling_cagr(log_prefix[start_idx:], window)
+        if cagr_array.size == 0:
+            return None
+
+        # The series stays float64 so exports and comparisons see exact values;
+        # arrays rather than lists keep pickled cache entries compact
+        return {
+            'cagrs': cagr_array,
+            'end_years': self.years_np[start_idx + window - 1:],
+            'best_cagr': float(cagr_array.max()),
+            'worst_cagr': float(cagr_array.min()),
+            'avg_cagr': np.mean(cagr_array),
+            'std_cagr': np.std(cagr_array),
+            'count': int(cagr_array.size)
+        }
+
+    def compute_no_loss_analysis(self, start_years: List[int], data_hash: str = None) -> Dict[str, Any]:
+        """Compute no-loss horizon analysis (view over compute_all_analyses)."""
+        return self.compute_all_analyses(start_years, [], [], data_hash, include_risk=False).get('no_loss', {})
+
+    def compute_convergence_analysis(self, start_years: List[int], thresholds: List[float], data_hash: str = None) -> Dict[str, Any]:
+        """Compute convergence analysis (view over compute_all_analyses)."""
+        return self.compute_all_analyses(
+            start_years, [], thresholds, data_hash, include_no_loss=False, include_risk=False
+        ).get('convergence', {})
+
+    def compute_all_analyses(self, start_years: List[int], windows: List[int], thresholds: List[float],
+                             data_hash: str = None, include_no_loss: bool = True,
+                             include_risk: bool = True) -> Dict[str, Any]:
+        """
+        Compute rolling, no-loss, convergence and risk metrics analysis in one pass per start year.
+
+        The best/worst/mean CAGR of every holding horizon is computed once per
+        start year; the no-loss and convergence horizons are then read off
+        those arrays instead of re-scanning the returns for each threshold.
+        The rolling risk metrics take their window CAGRs from the same
+        log-return prefix. compute_rolling_analysis, compute_no_loss_analysis,
+        compute_convergence_analysis and compute_risk_metrics_analysis return
+        slices of this result, so all of them share one per-tuple cache; they
+        turn off the no-loss and risk work they do not need with
+        include_no_loss / include_risk.
+
+        Risk metrics failures are isolated per start year: the start year is
+        left out of 'risk_metrics', its error message is returned in
+        'risk_errors' and the other analyses are unaffected.
+        """
+        if self.analyzer is None:
             return {}
-        
+
+        # Per-tuple results survive across calls for the same data, so adding a
+        # start year, window or threshold only computes the new tuples.
+        with self._tuple_cache_lock:
+            current_hash = self.get_data_hash()
+            cache = self._tuple_cache
+            if cache.get('data_hash') != current_hash:
+                cache.clear()
+                cache.update({
+                    'data_hash': current_hash, 'rolling': {}, 'no_loss': {}, 'convergence': {},
+                    'risk_overall': {}, 'risk_rolling': {}
+                })
+
+            # Work still missing from the cache, per start year
+            tasks = []
+            for start_year in dict.fromkeys(start_years):
+                missing_windows = [w for w in windows if (start_year, w) not in cache['rolling']]
+                missing_thresholds = [t for t in thresholds if (start_year, t) not in cache['convergence']]
+                need_no_loss = include_no_loss and start_year not in cache['no_loss']
+                need_risk = include_risk and (
+                    start_year not in cache['risk_overall']
+                    or any((start_year, w) not in cache['risk_rolling'] for w in windows)
+                )
+                if need_risk:
+                    missing_windows = list(windows)
+                if missing_windows or missing_thresholds or need_no_loss or need_risk:
+                    tasks.append((start_year, missing_windows, missing_thresholds, need_no_loss, need_risk))
+
+            # No spinner here: callers own it, so cache hits stay free of UI work
+            log_prefix = self._cached_logret_prefix()
+
+            def run_task(task):
+                return self._analyze_start_year(*task, log_prefix)
+
+            # Start years are independent and the numba kernels release the GIL,
+            # so a thread pool spreads them across cores without pickling.
+            if len(tasks) > 1:
+                max_workers = min(len(tasks), os.cpu_count() or 1)
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    task_results = list(executor.map(run_task, tasks))
+            else:
+                task_results = [run_task(task) for task in tasks]
+
+            risk_errors = {}
+            for (start_year, _, _, need_no_loss, need_risk), (rolling, no_loss, convergence, risk) in zip(
+                tasks, task_results
+            ):
+                for window, result in rolling.items():
+                    cache['rolling'][(start_year, window)] = result
+                if need_no_loss:
+                    cache['no_loss'][start_year] = no_loss
+                for threshold, result in convergence.items():
+                    cache['convergence'][(start_year, threshold)] = result
+                if not need_risk:
+                    continue
+                if 'error' in risk:
+                    # Not cached, so the next call retries this start year
+                    risk_errors[start_year] = risk['error']
+                    continue
+                cache['risk_overall'][start_year] = risk['overall']
+                for window, result in risk['rolling'].items():
+                    cache['risk_rolling'][(start_year, window)] = result
+
+            results = {
+                'rolling': {
+                    start_year: {window: cache['rolling'][(start_year, window)] for window in windows}
+                    for start_year in start_years
+                },
+                'convergence': {
+                    start_year: {threshold: cache['convergence'][(start_year, threshold)] for threshold in thresholds}
+                    for start_year in start_years
+                }
+            }
+            results['convergence_records'] = self._to_records(
+                [result for by_threshold in results['convergence'].values() for result in by_threshold.values()],
+                CONVERGENCE_RECORD_COLUMNS
+            )
+            if include_no_loss:
+                results['no_loss'] = {start_year: cache['no_loss'][start_year] for start_year in start_years}
+                # Column arrays for the detail tables
+                results['no_loss_records'] = self._to_records(
+                    list(results['no_loss'].values()), NO_LOSS_RECORD_COLUMNS
+                )
+            if include_risk:
+                results['risk_metrics'] = {
+                    start_year: {
+                        'overall': cache['risk_overall'][start_year],
+                        'rolling': {window: cache['risk_rolling'][(start_year, window)] for window in windows}
+                    }
+                    for start_year in start_years
+                    if start_year not in risk_errors
+                }
+                results['risk_errors'] = risk_errors
+
+            return results
+
+    @staticmethod
+    def _to_records(results: List[Dict[str, Any]], columns: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Turn a list of result dicts into parallel column arrays (structure of arrays).
+
+        Numeric columns become numeric arrays; columns holding 'N/A' markers or
+        window labels become object arrays. Keys missing from a result are 'N/A'.
+        """
+        records = {}
+        for column in columns:
+            values = [result.get(column, 'N/A') for result in results]
+            if all(isinstance(v, (int, float, np.integer, np.floating)) for v in values):
+                records[column] = np.asarray(values)
+            else:
+                records[column] = np.asarray(values, dtype=object)
+        return records
+
+    def _analyze_start_year(self, start_year: int, windows: List[int], thresholds: List[float],
+                            need_no_loss: bool, need_risk: bool,
+                            log_prefix: np.ndarray) -> Tuple[Dict, Optional[Dict], Dict, Dict]:
+        """
+        Kernel work for one start year: rolling stats for windows, convergence
+        results for thresholds and, if requested, the no-loss result and the
+        overall and rolling risk metrics. A risk metrics failure is returned as
+        {'error': message} instead of raised.
+
+        Runs in a worker thread, so it must not call Streamlit.
+        """
+        start_idx = self._get_start_index(start_year)
+        rolling = {window: self._rolling_window_stats(start_idx, window, log_prefix) for window in windows}
+
+        no_loss = None
+        convergence = {}
+        if need_no_loss or thresholds:
+            extremes = None
+            if start_idx is None:
+                no_loss = self._no_loss_result(start_year, None, None, None)
+            else:
+                extremes = horizon_extremes(log_prefix[start_idx:])
+                if need_no_loss:
+                    no_loss = self._no_loss_from_extremes(start_year, start_idx, extremes)
+            convergence = self._convergence_results(start_year, start_idx, thresholds, extremes)
+
+        risk = {'overall': None, 'rolling': {}}
+        if need_risk:
+            try:
+                risk = {
+                    'overall': self.analyzer.compute_risk_metrics(start_year),
+                    'rolling': self._rolling_risk_metrics(start_idx, windows, log_prefix)
+                }
+            except Exception as e:
+                # Reported by the caller; rolling, no-loss and convergence still return
+                risk = {'error': str(e)}
+
+        return rolling, no_loss, convergence, risk
+
+    def _rolling_risk_metrics(self, start_idx: Optional[int], windows: List[int],
+                              log_prefix: np.ndarray) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Rolling risk metrics of one start year for several windows.
+
+        Same result as SP500Analyzer.compute_rolling_risk_metrics, but the
+        risk-free rates are fetched once per start year, the metrics of every
+        window come from the rolling_risk_metrics kernel and the window CAGRs
+        from the rolling_cagr kernel.
+        """
+        if start_idx is None:
+            return {window: [] for window in windows}
+
+        period_returns = self.returns_np[start_idx:]
+        period_years = self.analyzer.years[start_idx:]
+        rf_rates = self.analyzer.get_risk_free_rates(period_years[0], period_years[-1])
+        if not rf_rates:
+            rf_array = np.full(period_returns.size, RISK_FREE_RATE_DEFAULT)
+        else:
+            rf_array = np.asarray(rf_rates, dtype=np.float64)
+
         results = {}
-        
-        with st.spinner("计算无损失持有期..."):
-            for start_year in start_years:
-                result = _self.analyzer.find_min_no_loss_horizon(start_year)
-                results[start_year] = result
-        
+        for window in windows:
+            if rf_array.size < period_returns.size:
+                # Rates do not cover every year: keep the reference per-window calculation
+                rolling_metrics = calculate_rolling_risk_metrics(self.analyzer.returns[start_idx:], window, rf_rates)
+            else:
+                columns = rolling_risk_metrics(period_returns, rf_array, window)
+                rolling_metrics = [
+                    dict(zip(RISK_METRIC_NAMES, values), window_start_index=i, window_end_index=i + window - 1)
+                    for i, values in enumerate(zip(*(column.tolist() for column in columns)))
+                ]
+            cagrs = rolling_cagr(log_prefix[start_idx:], window)
+            for i, metrics in enumerate(rolling_metrics):
+                metrics['start_year'] = period_years[i]
+                metrics['end_year'] = period_years[i + window - 1]
+                metrics['cagr'] = float(cagrs[i])
+            results[window] = rolling_metrics
         return results
-    
-    @st.cache_data
-    def compute_convergence_analysis(_self, start_years: List[int], thresholds: List[float], data_hash: str = None) -> Dict[str, Any]:
-        """Compute convergence analysis."""
-        if _self.analyzer is None:
-            return {}
-        
+
+    def _no_loss_from_extremes(self, start_year: int, start_idx: int, extremes: Tuple) -> Dict[str, Any]:
+        """Minimum horizon whose worst window is not a loss."""
+        worst = extremes[1]
+        candidates = np.flatnonzero(worst >= 0)
+        horizon = int(candidates[0]) + 1 if candidates.size else len(worst)
+        return self._no_loss_result(start_year, start_idx, horizon, extremes, met=bool(candidates.size))
+
+    def _convergence_results(self, start_year: int, start_idx: Optional[int], thresholds: List[float],
+                             extremes: Optional[Tuple] = None) -> Dict[float, Dict[str, Any]]:
+        """
+        Minimum convergence horizon of one start year for all thresholds at once.
+
+        The running minimum of the best-worst spread is non-increasing in the
+        horizon, so the first horizon within each threshold is found with a
+        single np.searchsorted call instead of a scan per threshold.
+        """
+        if start_idx is None:
+            return {
+                threshold: self._spread_result(start_year, threshold, None, None, None)
+                for threshold in thresholds
+            }
+
+        if extremes is None:
+            extremes = horizon_extremes(self._cached_logret_prefix()[start_idx:])
+
+        best, worst = extremes[0], extremes[1]
+        min_spread = np.minimum.accumulate(best - worst)
+        positions = np.searchsorted(-min_spread, -np.asarray(thresholds, dtype=np.float64), side='left')
+
+        max_feasible = len(best)
         results = {}
-        
-        with st.spinner("计算收敛性分析..."):
-            for start_year in start_years:
-                results[start_year] = {}
-                for threshold in thresholds:
-                    result = _self.analyzer.find_min_spread_horizon(start_year, threshold)
-                    results[start_year][threshold] = result
-        
+        for threshold, pos in zip(thresholds, positions):
+            met = pos < max_feasible
+            horizon = int(pos) + 1 if met else max_feasible
+            results[threshold] = self._spread_result(start_year, threshold, start_idx, horizon, extremes, met=met)
         return results
 
-    @st.cache_data
-    def compute_risk_metrics_analysis(_self, start_years: List[int], windows: List[int], data_hash: str = None) -> Dict[str, Any]:
-        """Compute risk metrics analysis with caching."""
-        if _self.analyzer is None:
-            return {}
+    def _window_label(self, start_idx: int, offset: int, horizon: int) -> str:
+        """Format the 'start-end' label of a window."""
+        years = self.analyzer.years
+        return f"{years[start_idx + offset]}-{years[start_idx + offset + horizon - 1]}"
 
-        try:
-            results = {}
+    def _no_loss_result(self, start_year, start_idx, horizon, extremes, met: bool = True) -> Dict[str, Any]:
+        """Build a no-loss result with the same keys as SP500Analyzer.find_min_no_loss_horizon."""
+        if horizon is None:
+            return {
+                'start_year_series': start_year,
+                'min_holding_years': 'N/A',
+                'worst_window': 'N/A',
+                'worst_cagr': np.nan,
+                'best_window': 'N/A',
+                'best_cagr': np.nan,
+                'average_cagr': np.nan,
+                'num_windows_checked': 0,
+                'note': 'No feasible windows'
+            }
 
-            with st.spinner("正在计算风险指标..."):
-                # Compute overall risk metrics for each start year
-                for start_year in start_years:
-                    year_results = {
-                        'overall': _self.analyzer.compute_risk_metrics(start_year),
-                        'rolling': {}
-                    }
+        best, worst, best_offset, worst_offset, mean = extremes
+        i = horizon - 1
+        result = {
+            'start_year_series': start_year,
+            'min_holding_years': horizon,
+            'worst_window': self._window_label(start_idx, worst_offset[i], horizon),
+            'worst_cagr': float(worst[i]),
+            'best_window': self._window_label(start_idx, best_offset[i], horizon),
+            'best_cagr': float(best[i]),
+            'average_cagr': float(mean[i]),
+            'num_windows_checked': len(best) - i
+        }
+        if not met:
+            result['note'] = 'Condition not met - max feasible horizon used'
+        return result
 
-                    # Compute rolling risk metrics for each window size
-                    for window in windows:
-                        rolling_metrics = _self.analyzer.compute_rolling_risk_metrics(start_year, window)
-                        year_results['rolling'][window] = rolling_metrics
+    def _spread_result(self, start_year, threshold, start_idx, horizon, extremes, met: bool = True) -> Dict[str, Any]:
+        """Build a convergence result with the same keys as SP500Analyzer.find_min_spread_horizon."""
+        if horizon is None:
+            return {
+                'start_year_series': start_year,
+                'threshold': threshold,
+                'min_holding_years': 'N/A',
+                'best_window': 'N/A',
+                'best_cagr': np.nan,
+                'worst_window': 'N/A',
+                'worst_cagr': np.nan,
+                'spread': np.nan,
+                'note': 'No feasible windows'
+            }
 
-                    results[start_year] = year_results
+        best, worst, best_offset, worst_offset, _ = extremes
+        i = horizon - 1
+        result = {
+            'start_year_series': start_year,
+            'threshold': threshold,
+            'min_holding_years': horizon,
+            'best_window': self._window_label(start_idx, best_offset[i], horizon),
+            'best_cagr': float(best[i]),
+            'worst_window': self._window_label(start_idx, worst_offset[i], horizon),
+            'worst_cagr': float(worst[i]),
+            'spread': float(best[i] - worst[i])
+        }
+        if not met:
+            del result['worst_window']
+            result['note'] = 'Threshold not met - max feasible horizon used'
+        return result
 
-            return results
+    def compute_risk_metrics_analysis(self, start_years: List[int], windows: List[int], data_hash: str = None) -> Dict[str, Any]:
+        """Compute risk metrics analysis (view over compute_all_analyses)."""
+        try:
+            results = self.compute_all_analyses(start_years, windows, [], data_hash, include_no_loss=False)
         except Exception as e:
             st.error(f"风险指标分析失败: {str(e)}")
             return {}
+        for start_year, message in results.get('risk_errors', {}).items():
+            st.error(f"风险指标分析失败 ({start_year}): {message}")
+        return results.get('risk_metrics', {})
 
     def generate_professional_report(self, report_type: str = 'pdf') -> bytes:
         """Generate professional PDF or Excel report."""
@@ -233,8 +623,8 @@ class DataProcessor:
         analysis_results = {}
 
         # Get configuration from session state or use defaults based on available data
-        min_year = min(self.data['year']) if hasattr(self, 'data') and self.data is not None else 1926
-        max_year = max(self.data['year']) if hasattr(self, 'data') and self.data is not None else 2023
+        min_year = int(self.years_np[0]) if self.years_np is not None else 1926
+        max_year = int(self.years_np[-1]) if self.years_np is not None else 2023
 
         # Use available years that exist in the data
         available_start_years = []
@@ -254,38 +644,19 @@ class DataProcessor:
         }
 
         try:
-            # Get rolling analysis
-            rolling_results = self.compute_rolling_analysis(
+            # Rolling, no-loss, convergence and risk results in one pass; the
+            # start years are fanned out over compute_all_analyses' thread pool
+            all_results = self.compute_all_analyses(
                 config['start_years'],
                 config['windows'],
-                data_hash
-            )
-            analysis_results['rolling'] = rolling_results
-
-            # Get no-loss analysis
-            no_loss_results = self.compute_no_loss_analysis(
-                config['start_years'],
-                data_hash
-            )
-            analysis_results['no_loss'] = no_loss_results
-
-            # Get convergence analysis
-            convergence_results = self.compute_convergence_analysis(
-                config['start_years'],
                 config['thresholds'],
                 data_hash
             )
-            analysis_results['convergence'] = convergence_results
+            for key in ('rolling', 'no_loss', 'convergence', 'risk_metrics'):
+                analysis_results[key] = all_results[key]
 
-            # Get risk metrics analysis
-            risk_metrics_results = self.compute_risk_metrics_analysis(
-                config['start_years'],
-                config['windows'],
-                data_hash
-            )
-            analysis_results['risk_metrics'] = risk_metrics_results
-
-            # Generate comprehensive report
+            # Generate comprehensive report (reportlab/openpyxl are only imported here)
+            from report_generator import generate_comprehensive_report
             return generate_comprehensive_report(analysis_results, config, report_type)
 
         except Exception as e:
@@ -318,6 +689,7 @@ class DataProcessor:
                     if 'overall' in year_data and year_data['overall']:
                         risk_data['overall_metrics'][start_year] = year_data['overall']
 
+                from report_generator import ChartExporter
                 return ChartExporter.export_risk_metrics_chart(risk_data, format)
 
             else:
@@ -390,7 +762,7 @@ class DataProcessor:
                     # Efficient frontier (if 2-8 assets)
                     if 2 <= len(self.selected_assets) <= 8:
                         efficient_frontier = self.multi_asset_analyzer.get_efficient_frontier(
-                            self.selected_assets, start_year, end_year, num_portfolios=1000
+                            self.selected_assets, start_year, end_year, num_portfolios=100
                         )
                         results['efficient_frontier'] = efficient_frontier
 
@@ -428,16 +800,18 @@ class DataProcessor:
             if not assets:
                 continue
 
-            # Calculate average metrics
-            avg_metrics = {}
-            metric_keys = assets[0]['metrics'].keys()
-
-            for key in metric_keys:
-                values = [asset['metrics'].get(key, 0) for asset in assets if not pd.isna(asset['metrics'].get(key, np.nan))]
-                if values:
-                    avg_metrics[key] = np.mean(values)
-                else:
-                    avg_metrics[key] = np.nan
+            # Calculate average metrics: one NaN-aware column reduction over
+            # an (assets x metrics) matrix; all-NaN metrics stay NaN
+            metric_keys = list(assets[0]['metrics'].keys())
+            values = np.array(
+                [[asset['metrics'].get(key, np.nan) for key in metric_keys] for asset in assets],
+                dtype=np.float64
+            )
+            valid = ~np.isnan(values)
+            counts = valid.sum(axis=0)
+            means = np.divide(np.where(valid, values, 0.0).sum(axis=0), counts,
+                              out=np.full(len(metric_keys), np.nan), where=counts > 0)
+            avg_metrics = dict(zip(metric_keys, means.tolist()))
 
             asset_class_summary[asset_class] = {
                 'count': len(assets),
@@ -481,82 +855,110 @@ class DataProcessor:
         if start_year not in rolling_results:
             return pd.DataFrame()
         
-        data_rows = []
         year_data = rolling_results[start_year]
         
-        # Get all end years from the first available window
-        end_years = None
+        windows = [window for window in sorted(year_data.keys()) if year_data[window] is not None]
+        if not windows:
+            return pd.DataFrame()
+
+        # The longest end-year series covers every window's end years
+        end_years = max((year_data[window]['end_years'] for window in windows), key=len)
+
+        # One column per window, taken straight from the CAGR arrays and aligned
+        # by end year; longer windows start later and are NaN-padded at the front
+        columns = {'EndYear': end_years}
         for window in sorted(year_data.keys()):
+            column = np.full(len(end_years), np.nan)
             if year_data[window] is not None:
-                end_years = year_data[window]['end_years']
-                break
-        
-        if end_years is None:
-            return pd.DataFrame()
-        
-        # Create rows for each end year
-        for i, end_year in enumerate(end_years):
-            row = {'EndYear': end_year}
-            for window in sorted(year_data.keys()):
-                if year_data[window] is not None and i < len(year_data[window]['cagrs']):
-                    row[f'{window}y'] = year_data[window]['cagrs'][i]
-                else:
-                    row[f'{window}y'] = None
-            data_rows.append(row)
-        
-        return pd.DataFrame(data_rows)
+                column[np.searchsorted(end_years, year_data[window]['end_years'])] = year_data[window]['cagrs']
+            columns[f'{window}y'] = column
+
+        return pd.DataFrame(columns)
     
     def create_summary_dataframe(self, rolling_results: Dict[str, Any], start_year: int) -> pd.DataFrame:
         """Create a summary DataFrame for window statistics (enhanced)."""
-        if start_year not in rolling_results:
-            return pd.DataFrame()
+        return self.create_summary_dataframe_all(rolling_results, [start_year])[start_year]
 
-        year_data = rolling_results[start_year]
-        summary_rows = []
+    def create_summary_dataframe_all(self, rolling_results: Dict[str, Any], start_years: List[int]) -> Dict[int, pd.DataFrame]:
+        """
+        Create the window statistics summary for several start years at once.
 
-        for window in sorted(year_data.keys()):
-            if year_data[window] is not None:
-                data = year_data[window]
-
-                # Find best and worst windows
-                best_idx = np.argmax(data['cagrs'])
-                worst_idx = np.argmin(data['cagrs'])
-
-                # Additional metrics
-                cagrs = np.array(data['cagrs']) if data['cagrs'] else np.array([])
-                if cagrs.size > 0:
-                    p10 = float(np.percentile(cagrs, 10))
-                    p50 = float(np.percentile(cagrs, 50))
-                    p90 = float(np.percentile(cagrs, 90))
-                else:
-                    p10 = p50 = p90 = None
-                avg = data['avg_cagr']
-                std = data['std_cagr']
-                stability_index = (avg / std) if (isinstance(avg, (int,float)) and isinstance(std,(int,float)) and std not in (0.0, 0)) else None
-                variation_coeff = (std / abs(avg)) if (isinstance(avg, (int,float)) and avg not in (0.0,)) else None
-
-                summary_rows.append({
-                    'window_size': window,
-                    'best_window': f"{start_year}-{data['end_years'][best_idx]}",
-                    'best_cagr': data['best_cagr'],
-                    'worst_window': f"{start_year}-{data['end_years'][worst_idx]}",
-                    'worst_cagr': data['worst_cagr'],
-                    'avg_cagr': data['avg_cagr'],
-                    'std_cagr': data['std_cagr'],
-                    'p10_cagr': p10,
-                    'median_cagr': p50,
-                    'p90_cagr': p90,
-                    'stability_index': stability_index,
-                    'variation_coeff': variation_coeff,
-                    'count': data['count']
-                })
+        The rolling CAGRs of every (start year, window) pair are stacked into
+        one NaN-padded 2D array, so the percentiles and best/worst positions
+        are single NumPy reductions along axis 1 instead of per-window calls.
 
-        return pd.DataFrame(summary_rows)
-    
-    def export_results_to_csv(self, results: Dict[str, Any], filename: str) -> bytes:
-        """Export results to CSV format."""
-        if isinstance(results, pd.DataFrame):
-            return results
+        Returns:
+            Dictionary mapping start year to its summary DataFrame (empty if no data)
+        """
+        entries = [
+            (start_year, window, data)
+            for start_year in start_years
+            for window, data in sorted(rolling_results.get(start_year, {}).items())
+            if data is not None and len(data['cagrs'])
+        ]
+
+        if not entries:
+            return {start_year: pd.DataFrame() for start_year in start_years}
+
+        max_len = max(len(data['cagrs']) for _, _, data in entries)
+        padded = np.full((len(entries), max_len), np.nan)
+        for row, (_, _, data) in enumerate(entries):
+            padded[row, :len(data['cagrs'])] = data['cagrs']
+
+        p10, p50, p90 = np.nanpercentile(padded, [10, 50, 90], axis=1)
+        best_idx = np.nanargmax(padded, axis=1)
+        worst_idx = np.nanargmin(padded, axis=1)
+        # Typed column buffers, so the DataFrame needs no per-row dtype inference
+        n = len(entries)
+        start_year_col = np.fromiter((start_year for start_year, _, _ in entries), dtype=np.int64, count=n)
+        window_col = np.fromiter((window for _, window, _ in entries), dtype=np.int64, count=n)
+        best = np.fromiter((data['best_cagr'] for _, _, data in entries), dtype=np.float64, count=n)
+        worst = np.fromiter((data['worst_cagr'] for _, _, data in entries), dtype=np.float64, count=n)
+        avg = np.fromiter((data['avg_cagr'] for _, _, data in entries), dtype=np.float64, count=n)
+        std = np.fromiter((data['std_cagr'] for _, _, data in entries), dtype=np.float64, count=n)
+        count = np.fromiter((data['count'] for _, _, data in entries), dtype=np.int64, count=n)
+        best_window = np.empty(n, dtype=object)
+        worst_window = np.empty(n, dtype=object)
+        for row, ((start_year, _, data), b, w) in enumerate(zip(entries, best_idx, worst_idx)):
+            best_window[row] = f"{start_year}-{data['end_years'][b]}"
+            worst_window[row] = f"{start_year}-{data['end_years'][w]}"
+
+        summary = pd.DataFrame({
+            'start_year': start_year_col,
+            'window_size': window_col,
+            'best_window': best_window,
+            'best_cagr': best,
+            'worst_window': worst_window,
+            'worst_cagr': worst,
+            'avg_cagr': avg,
+            'std_cagr': std,
+            'p10_cagr': p10,
+            'median_cagr': p50,
+            'p90_cagr': p90,
+            'stability_index': np.divide(avg, std, out=np.full_like(avg, np.nan), where=std != 0),
+            'variation_coeff': np.divide(std, np.abs(avg), out=np.full_like(std, np.nan), where=avg != 0),
+            'count': count
+        })
+
+        grouped = {
+            start_year: group.drop(columns='start_year').reset_index(drop=True)
+            for start_year, group in summary.groupby('start_year', sort=False)
+        }
+        return {start_year: grouped.get(start_year, pd.DataFrame()) for start_year in start_years}
+
+    @staticmethod
+    def export_results_to_csv(results: Any, filename: str = None) -> bytes:
+        """
+        Export results (a DataFrame, or rows/columns a DataFrame can be built from) to CSV bytes.
+
+        Written with DataFrame.to_csv, so the files match the other CSV
+        downloads byte for byte; the bytes go straight into a buffer, with no
+        intermediate str to re-encode.
+        """
+        df = results if isinstance(results, pd.DataFrame) else pd.DataFrame(results)
+        buffer = io.BytesIO()
+        df.to_csv(buffer, index=False, encoding='utf-8')
+        return buffer.getvalue()
 
     def compute_gips_compliance_analysis(
         self,
@@ -628,32 +1030,42 @@ class DataProcessor:
             }
         }
 
+    def _period_bounds(self, start_year: int, end_year: int) -> Tuple[int, int]:
+        """Slice bounds [lo, hi) of start_year..end_year (inclusive) in the sorted arrays."""
+        lo = int(np.searchsorted(self.years_np, start_year, side='left'))
+        hi = int(np.searchsorted(self.years_np, end_year, side='right'))
+        return lo, hi
+
+    def _period_arrays(self, start_year: int, end_year: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Year and return array views for start_year..end_year (inclusive), via binary search."""
+        lo, hi = self._period_bounds(start_year, end_year)
+        return self.years_np[lo:hi], self.returns_np[lo:hi]
+
     def _prepare_portfolio_data_for_gips(self, start_year: int, end_year: int) -> Dict:
         """Prepare portfolio data for GIPS calculations."""
-        # Filter data for the specified period
-        period_data = self.data[
-            (self.data['year'] >= start_year) &
-            (self.data['year'] <= end_year)
-        ].copy()
+        years, returns = self._period_arrays(start_year, end_year)
 
-        if period_data.empty:
+        if years.size == 0:
             raise ValueError(f"No data available for period {start_year}-{end_year}")
 
-        # Create portfolio valuations
-        valuations = []
-        for _, row in period_data.iterrows():
-            date = datetime(int(row['year']), 12, 31)
-            # Simulate portfolio value based on cumulative returns
-            market_value = 1000000 * (1 + row['return']) ** (row['year'] - start_year + 1)
-            valuations.append(PortfolioValuation(date, market_value))
+        # Simulate portfolio values based on cumulative returns, for all years at once
+        market_values = 1000000 * np.power(1.0 + returns, years - start_year + 1)
 
-        # Add starting valuation
-        start_date = datetime(start_year, 1, 1)
-        valuations.insert(0, PortfolioValuation(start_date, 1000000.0))
+        # Year-end dates built in one vectorized call rather than a datetime() per year
+        year_ends = pd.DatetimeIndex(
+            pd.to_datetime({'year': years, 'month': 12, 'day': 31})
+        ).to_pydatetime()
+
+        # Starting valuation followed by one year-end valuation per year
+        valuations = [PortfolioValuation(datetime(start_year, 1, 1), 1000000.0)]
+        valuations.extend(
+            PortfolioValuation(year_end, market_value)
+            for year_end, market_value in zip(year_ends, market_values.tolist())
+        )
 
         # Create sample cash flows (for demonstration)
         cash_flows = []
-        if len(period_data) > 2:
+        if years.size > 2:
             mid_year = start_year + (end_year - start_year) // 2
             cash_flows.append(
                 CashFlow(datetime(mid_year, 6, 30), 50000.0, "contribution")
@@ -662,30 +1074,29 @@ class DataProcessor:
         return {
             'valuations': valuations,
             'cash_flows': cash_flows,
-            'returns': period_data['return'].tolist(),
-            'years': period_data['year'].tolist()
+            'returns': returns.tolist(),
+            'years': years.tolist()
         }
 
     def _prepare_benchmark_data_for_gips(self, benchmark_symbol: str, start_year: int, end_year: int) -> Dict:
         """Prepare benchmark data for GIPS calculations."""
         # For demonstration, use S&P 500 data as benchmark
         # In practice, this would load actual benchmark data
-        period_data = self.data[
-            (self.data['year'] >= start_year) &
-            (self.data['year'] <= end_year)
-        ].copy()
+        lo, hi = self._period_bounds(start_year, end_year)
 
-        if period_data.empty:
+        if hi <= lo:
             return {'returns': [], 'total_return': 0.0}
 
-        benchmark_returns = period_data['return'].tolist()
-        total_return = np.prod([1 + r for r in benchmark_returns]) - 1
+        years, benchmark_returns = self.years_np[lo:hi], self.returns_np[lo:hi]
+        # Total compounded return straight from the shared log-return prefix
+        log_prefix = self._cached_logret_prefix()
+        total_return = float(np.expm1(log_prefix[hi] - log_prefix[lo]))
 
         return {
-            'returns': benchmark_returns,
+            'returns': benchmark_returns.tolist(),
             'total_return': total_return,
             'symbol': benchmark_symbol,
-            'years': period_data['year'].tolist()
+            'years': years.tolist()
         }
 
     def _calculate_gips_returns(
@@ -763,40 +1174,10 @@ class DataProcessor:
 
     def _validate_benchmark_selection(self, benchmark_symbol: str) -> Dict:
         """Validate benchmark selection appropriateness."""
-        portfolio_characteristics = {
-            "asset_class": "equity",
-            "geography": "US",
-            "investment_style": "large_cap_blend",
-            "market_cap_focus": "large_cap"
-        }
-
-        # Define benchmark characteristics based on symbol
-        benchmark_chars_map = {
-            "SPY": {
-                "asset_class": "equity",
-                "geography": "US",
-                "investment_style": "large_cap_blend",
-                "market_cap_focus": "large_cap"
-            },
-            "QQQ": {
-                "asset_class": "equity",
-                "geography": "US",
-                "investment_style": "large_cap_growth",
-                "market_cap_focus": "large_cap"
-            },
-            "IWM": {
-                "asset_class": "equity",
-                "geography": "US",
-                "investment_style": "small_cap_blend",
-                "market_cap_focus": "small_cap"
-            }
-        }
-
-        benchmark_characteristics = benchmark_chars_map.get(benchmark_symbol, {
-            "asset_class": "unknown",
-            "geography": "unknown",
-            "investment_style": "unknown"
-        })
+        portfolio_characteristics = GIPS_PORTFOLIO_CHARACTERISTICS
+        benchmark_characteristics = BENCHMARK_CHARACTERISTICS.get(
+            benchmark_symbol, UNKNOWN_BENCHMARK_CHARACTERISTICS
+        )
 
         is_appropriate, validation_notes = self.benchmark_standardizer.validate_benchmark_appropriateness(
             portfolio_characteristics, benchmark_characteristics
@@ -805,6 +1186,7 @@ class DataProcessor:
         return {
             'is_appropriate': is_appropriate,
             'validation_notes': validation_notes,
-            'portfolio_characteristics': portfolio_characteristics,
-            'benchmark_characteristics': benchmark_characteristics
+            # Copies, so callers cannot modify the module-level tables
+            'portfolio_characteristics': dict(portfolio_characteristics),
+            'benchmark_characteristics': dict(benchmark_characteristics)
         }
@@ -55,6 +55,9 @@ def debug_config_flow():
     with col1:
         if st.button("🔄 清除缓存"):
             st.cache_data.clear()
+            # 分析结果缓存不在 st.cache_data 中，需单独清除
+            if 'data_processor' in st.session_state:
+                st.session_state.data_processor.clear_caches()
             st.success("缓存已清除")
             st.rerun()
     
@@ -73,7 +76,8 @@ def debug_config_flow():
                 with st.spinner("重新分析中..."):
                     rolling_results = processor.compute_rolling_analysis(
                         config['start_years'], 
-                        config['windows']
+                        config['windows'],
+                        data_hash=processor.get_data_hash()
                     )
                     
                     st.session_state.analysis_results = {
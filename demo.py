@@ -31,23 +31,27 @@ def create_realistic_sp500_data():
         (2010, 2023, 0.12, 0.15),    # Recovery and growth
     ]
     
-    data = []
     np.random.seed(42)  # For reproducible results
-    
+
+    years = []
+    returns = []
     for start_year, end_year, mean_return, volatility in periods:
-        for year in range(start_year, end_year + 1):
-            # Add some realistic year-to-year correlation
-            if year == start_year:
-                base_return = np.random.normal(mean_return, volatility)
-            else:
-                # Add some persistence
-                base_return = 0.7 * base_return + 0.3 * np.random.normal(mean_return, volatility)
-            
-            # Ensure returns are reasonable
-            return_val = max(-0.50, min(0.80, base_return))
-            data.append([year, return_val])
-    
-    df = pd.DataFrame(data, columns=['year', 'return'])
+        n = end_year - start_year + 1
+        # All draws of the period at once (same sequence as one draw per year)
+        noise = np.random.normal(mean_return, volatility, size=n)
+
+        # Add some realistic year-to-year correlation: base[t] = 0.7 * base[t-1] + 0.3 * noise[t],
+        # starting from base[0] = noise[0]
+        base_returns = np.empty(n)
+        base_returns[0] = noise[0]
+        for t in range(1, n):
+            base_returns[t] = 0.7 * base_returns[t - 1] + 0.3 * noise[t]
+
+        years.append(np.arange(start_year, end_year + 1))
+        # Ensure returns are reasonable
+        returns.append(np.clip(base_returns, -0.50, 0.80))
+
+    df = pd.DataFrame({'year': np.concatenate(years), 'return': np.concatenate(returns)})
     print(f"Created {len(df)} years of data: {df['year'].min()} to {df['year'].max()}")
     print(f"Sample statistics:")
     print(f"  Mean return: {df['return'].mean():.3f}")
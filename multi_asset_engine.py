@@ -177,6 +177,50 @@ class MockDataProvider(AssetDataProvider):
             return 0.0
 
 
+def _frontier_closed_form(expected_returns: np.ndarray, cov_matrix: np.ndarray,
+                          num_points: int, risk_free_rate: float) -> Optional[np.ndarray]:
+    """
+    Weights of the efficient (upper) branch of the minimum-variance frontier,
+    solved in closed form with short sales allowed.
+
+    With a = 1'S^-1 1, b = 1'S^-1 mu, c = mu'S^-1 mu and d = ac - b^2, the
+    minimum-variance portfolio for target return m is
+    w(m) = ((c - b m) S^-1 1 + (a m - b) S^-1 mu) / d. Target returns start at
+    the global minimum-variance return b / a and run to twice the distance of
+    the tangency return (c - b rf) / (b - a rf), so the maximum-Sharpe
+    portfolio lies inside the grid. If the risk-free rate is not below the
+    minimum-variance return there is no tangency on the efficient branch and
+    the grid ends at the highest expected asset return instead.
+
+    Returns:
+        (num_points, num_assets) weight array, or None if the covariance
+        matrix is singular or all expected returns are equal
+    """
+    ones = np.ones_like(expected_returns)
+    try:
+        inv_ones = np.linalg.solve(cov_matrix, ones)
+        inv_mu = np.linalg.solve(cov_matrix, expected_returns)
+    except np.linalg.LinAlgError:
+        return None
+
+    a = ones @ inv_ones
+    b = ones @ inv_mu
+    c = expected_returns @ inv_mu
+    d = a * c - b * b
+    if not np.isfinite(d) or d <= 1e-12 * max(abs(a * c), 1.0):
+        return None
+
+    gmv_return = b / a
+    if b - a * risk_free_rate > 0:
+        tangency_return = (c - b * risk_free_rate) / (b - a * risk_free_rate)
+        top_return = 2 * tangency_return - gmv_return
+    else:
+        top_return = max(expected_returns.max(), gmv_return)
+
+    targets = np.linspace(gmv_return, top_return, num_points)
+    return (np.outer(c - b * targets, inv_ones) + np.outer(a * targets - b, inv_mu)) / d
+
+
 class MultiAssetAnalyzer:
     """Multi-asset analysis engine."""
     
@@ -280,8 +324,19 @@ class MultiAssetAnalyzer:
         return metrics
     
     def get_efficient_frontier(self, symbols: List[str], start_year: int, end_year: int, 
-                             num_portfolios: int = 100) -> Dict[str, List[float]]:
-        """Calculate efficient frontier for given assets."""
+                             num_portfolios: int = 100, closed_form: bool = False) -> Dict[str, np.ndarray]:
+        """
+        Calculate efficient frontier for given assets.
+
+        By default random long-only portfolios are evaluated at once. With
+        closed_form=True the efficient branch of the minimum-variance frontier
+        is computed analytically instead (num_portfolios points, short sales
+        allowed, so weights can be negative), falling back to the random
+        portfolios if the covariance matrix is singular.
+
+        returns, volatility and sharpe_ratio are 1-D arrays and weights is a
+        (num_portfolios, num_assets) array.
+        """
         # Load data for all assets
         returns_data = {}
         for symbol in symbols:
@@ -291,38 +346,34 @@ class MultiAssetAnalyzer:
         returns_df = pd.DataFrame(returns_data)
         
         # Calculate expected returns and covariance matrix
-        expected_returns = returns_df.mean()
-        cov_matrix = returns_df.cov()
-        
-        # Generate random portfolios
-        num_assets = len(symbols)
-        results = {
-            'returns': [],
-            'volatility': [],
-            'sharpe_ratio': [],
-            'weights': []
-        }
+        expected_returns = returns_df.mean().to_numpy()
+        cov_matrix = returns_df.cov().to_numpy()
         
         # Get risk-free rate
         rf_data = self.rf_provider.get_risk_free_rate(start_year, end_year)
         risk_free_rate = rf_data['risk_free_rate'].mean()
         
-        for _ in range(num_portfolios):
-            # Generate random weights
-            weights = np.random.random(num_assets)
-            weights /= np.sum(weights)
-            
-            # Calculate portfolio metrics
-            portfolio_return = np.sum(expected_returns * weights)
-            portfolio_volatility = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
-            sharpe_ratio = (portfolio_return - risk_free_rate) / portfolio_volatility
-            
-            results['returns'].append(portfolio_return)
-            results['volatility'].append(portfolio_volatility)
-            results['sharpe_ratio'].append(sharpe_ratio)
-            results['weights'].append(weights.tolist())
+        weights = None
+        if closed_form:
+            weights = _frontier_closed_form(expected_returns, cov_matrix, num_portfolios, risk_free_rate)
+
+        if weights is None:
+            # Generate random weights (same draws as one np.random.random(num_assets) per portfolio)
+            num_assets = len(symbols)
+            weights = np.random.random((num_portfolios, num_assets))
+            weights /= weights.sum(axis=1, keepdims=True)
         
-        return results
+        # Calculate portfolio metrics
+        portfolio_returns = weights @ expected_returns
+        portfolio_volatility = np.sqrt(np.einsum('ij,jk,ik->i', weights, cov_matrix, weights))
+        sharpe_ratio = (portfolio_returns - risk_free_rate) / portfolio_volatility
+        
+        return {
+            'returns': portfolio_returns,
+            'volatility': portfolio_volatility,
+            'sharpe_ratio': sharpe_ratio,
+            'weights': weights
+        }
     
     def get_asset_summary(self, symbol: str, start_year: int, end_year: int) -> Dict[str, Any]:
         """Get comprehensive summary for an asset."""
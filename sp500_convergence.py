@@ -10,8 +10,10 @@ Author: Data Engineer
 
 import argparse
 import csv
+import io
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import List, Tuple, Optional, Dict, Any
 import warnings
@@ -32,6 +34,11 @@ DEFAULT_WINDOWS = [5, 10, 15, 20, 30]
 DEFAULT_START_YEARS = [1926, 1957, 1972, 1985]
 DEFAULT_THRESHOLDS = [0.0025, 0.005, 0.0075, 0.01]
 SLICKCHARTS_URL = "https://www.slickcharts.com/sp500/returns/history.csv"
+# Rows per chunk when streaming a CSV in load_local_csv
+CSV_CHUNK_ROWS = 200_000
+# generate_spread_grid only uses worker processes from this many (start year,
+# threshold) pairs; below it, process start-up costs more than the searches
+SPREAD_GRID_PARALLEL_MIN_PAIRS = 64
 
 
 class SP500Analyzer:
@@ -107,6 +114,11 @@ class SP500Analyzer:
             results[window_size] = self.compute_rolling_cagr(window_size, start_year)
         return results
     
+    @staticmethod
+    def _cagr_values(cagrs: List[Tuple[int, float]]) -> np.ndarray:
+        """CAGR column of (end_year, CAGR) tuples as a float array, in one pass."""
+        return np.fromiter((cagr for _, cagr in cagrs), dtype=np.float64, count=len(cagrs))
+
     def compute_window_statistics(self, start_year: int) -> pd.DataFrame:
         """
         Compute statistics for each window size.
@@ -136,8 +148,9 @@ class SP500Analyzer:
                 continue
                 
             # Find best and worst windows
-            best_idx = np.argmax([cagr for _, cagr in cagrs])
-            worst_idx = np.argmin([cagr for _, cagr in cagrs])
+            cagr_values = self._cagr_values(cagrs)
+            best_idx = np.argmax(cagr_values)
+            worst_idx = np.argmin(cagr_values)
             
             # Calculate start year for each window
             start_idx = self.years.index(start_year)
@@ -152,7 +165,7 @@ class SP500Analyzer:
                 'best_cagr': cagrs[best_idx][1],
                 'worst_window': f"{worst_start}-{worst_end}",
                 'worst_cagr': cagrs[worst_idx][1],
-                'avg_cagr': np.mean([cagr for _, cagr in cagrs]),
+                'avg_cagr': np.mean(cagr_values),
                 'count': len(cagrs)
             })
             
@@ -175,11 +188,11 @@ class SP500Analyzer:
             if not cagrs:
                 continue
                 
-            min_cagr = min(cagr for _, cagr in cagrs)
-            if min_cagr >= 0:
+            cagr_values = self._cagr_values(cagrs)
+            if cagr_values.min() >= 0:
                 # Found the minimum no-loss horizon
-                best_idx = np.argmax([cagr for _, cagr in cagrs])
-                worst_idx = np.argmin([cagr for _, cagr in cagrs])
+                best_idx = np.argmax(cagr_values)
+                worst_idx = np.argmin(cagr_values)
                 
                 start_idx = self.years.index(start_year)
                 best_start = self.years[start_idx + best_idx]
@@ -194,15 +207,16 @@ class SP500Analyzer:
                     'worst_cagr': cagrs[worst_idx][1],
                     'best_window': f"{best_start}-{best_end}",
                     'best_cagr': cagrs[best_idx][1],
-                    'average_cagr': np.mean([cagr for _, cagr in cagrs]),
+                    'average_cagr': np.mean(cagr_values),
                     'num_windows_checked': len(cagrs)
                 }
         
         # If no N satisfies the condition, return max feasible
         cagrs = self.compute_rolling_cagr(max_feasible, start_year)
         if cagrs:
-            best_idx = np.argmax([cagr for _, cagr in cagrs])
-            worst_idx = np.argmin([cagr for _, cagr in cagrs])
+            cagr_values = self._cagr_values(cagrs)
+            best_idx = np.argmax(cagr_values)
+            worst_idx = np.argmin(cagr_values)
             
             start_idx = self.years.index(start_year)
             best_start = self.years[start_idx + best_idx]
@@ -217,7 +231,7 @@ class SP500Analyzer:
                 'worst_cagr': cagrs[worst_idx][1],
                 'best_window': f"{best_start}-{best_end}",
                 'best_cagr': cagrs[best_idx][1],
-                'average_cagr': np.mean([cagr for _, cagr in cagrs]),
+                'average_cagr': np.mean(cagr_values),
                 'num_windows_checked': len(cagrs),
                 'note': 'Condition not met - max feasible horizon used'
             }
@@ -252,8 +266,8 @@ class SP500Analyzer:
             if not cagrs:
                 continue
                 
-            cagr_values = [cagr for _, cagr in cagrs]
-            spread = max(cagr_values) - min(cagr_values)
+            cagr_values = self._cagr_values(cagrs)
+            spread = float(cagr_values.max() - cagr_values.min())
             
             if spread <= threshold:
                 # Found the minimum spread horizon
@@ -280,8 +294,8 @@ class SP500Analyzer:
         # If no N satisfies the condition, return max feasible
         cagrs = self.compute_rolling_cagr(max_feasible, start_year)
         if cagrs:
-            cagr_values = [cagr for _, cagr in cagrs]
-            spread = max(cagr_values) - min(cagr_values)
+            cagr_values = self._cagr_values(cagrs)
+            spread = float(cagr_values.max() - cagr_values.min())
             
             best_idx = np.argmax(cagr_values)
             worst_idx = np.argmin(cagr_values)
@@ -499,21 +513,54 @@ def download_slickcharts_data() -> pd.DataFrame:
         sys.exit(1)
 
 
-def load_local_csv(filepath: str) -> pd.DataFrame:
+def _clean_csv_chunk(years: pd.Series, returns: pd.Series) -> pd.DataFrame:
+    """
+    Convert one chunk of raw year/return values to a clean year/return frame.
+
+    Rows whose year or return is not numeric are dropped, and returns that look
+    like percentages (|r| > 1) are converted to decimals.
+    """
+    year_values = pd.to_numeric(years, errors='coerce')
+    return_values = pd.to_numeric(returns, errors='coerce').astype(np.float64)
+    valid = year_values.notna() & return_values.notna()
+
+    return_values = return_values[valid]
+    return_values = return_values.where(return_values.abs() <= 1.0, return_values / 100.0)
+
+    return pd.DataFrame({
+        'year': year_values[valid].astype(np.int64).to_numpy(),
+        'return': return_values.to_numpy()
+    })
+
+
+def _open_csv_text(source):
+    """Open a CSV path for reading, or wrap an in-memory buffer as text from its start."""
+    if hasattr(source, 'read'):
+        source.seek(0)
+        content = source.read()
+        if isinstance(content, bytes):
+            content = content.decode('utf-8')
+        return io.StringIO(content)
+    return open(source, 'r')
+
+
+def load_local_csv(filepath) -> pd.DataFrame:
     """
     Load S&P 500 data from a local CSV file.
     
     Args:
-        filepath: Path to the CSV file
+        filepath: Path to the CSV file, or a file-like object (e.g. io.BytesIO)
+            holding its contents
         
     Returns:
         DataFrame with year and return columns
     """
-    print(f"Loading data from {filepath}...")
+    source_name = "uploaded buffer" if hasattr(filepath, 'read') else filepath
+    print(f"Loading data from {source_name}...")
     
     try:
-        # Try to read with pandas first
-        df = pd.read_csv(filepath)
+        # Read only the header first, to pick the year/return columns
+        df = pd.read_csv(filepath, nrows=0)
         
         # Auto-detect columns
         if len(df.columns) >= 2:
@@ -533,29 +580,22 @@ def load_local_csv(filepath: str) -> pd.DataFrame:
                 year_col = df.columns[0]
                 return_col = df.columns[1]
             
-            # Extract and clean data
-            data = []
-            for _, row in df.iterrows():
-                try:
-                    year = int(row[year_col])
-                    ret_val = float(row[return_col])
-                    
-                    # Convert to decimal if it looks like percentage
-                    if abs(ret_val) > 1.0:
-                        ret_val = ret_val / 100.0
-                    
-                    data.append([year, ret_val])
-                except (ValueError, TypeError):
-                    continue
+            # Stream just those two columns in chunks, so peak memory stays
+            # bounded by one chunk even for very large files
+            if hasattr(filepath, 'seek'):
+                filepath.seek(0)
+            reader = pd.read_csv(filepath, usecols=[year_col, return_col], chunksize=CSV_CHUNK_ROWS)
+            df_clean = pd.concat(
+                [_clean_csv_chunk(chunk[year_col], chunk[return_col]) for chunk in reader],
+                ignore_index=True
+            )
             
-            if not data:
+            if df_clean.empty:
                 raise ValueError("No valid data found in CSV")
             
-            df_clean = pd.DataFrame(data, columns=['year', 'return'])
-            
         else:
             # Try manual parsing for headerless CSV
-            with open(filepath, 'r') as f:
+            with _open_csv_text(filepath) as f:
                 reader = csv.reader(f)
                 data = []
                 for row in reader:
@@ -680,6 +720,21 @@ def generate_no_loss_summary(analyzer: SP500Analyzer, start_years: List[int], ou
     print(f"  Saved: min_no_loss_summary.csv")
 
 
+# Per-process analyzer for generate_spread_grid's worker processes
+_spread_analyzer = None
+
+
+def _init_spread_worker(data: pd.DataFrame):
+    """Build the worker process's analyzer once, from the parent's data."""
+    global _spread_analyzer
+    _spread_analyzer = SP500Analyzer(data)
+
+
+def _spread_worker(pair: Tuple[int, float]) -> Dict[str, Any]:
+    """find_min_spread_horizon for one (start_year, threshold) pair in a worker process."""
+    return _spread_analyzer.find_min_spread_horizon(*pair)
+
+
 def generate_spread_grid(analyzer: SP500Analyzer, start_years: List[int], thresholds: List[float], outdir: str):
     """
     Generate spread threshold grid CSV.
@@ -692,11 +747,17 @@ def generate_spread_grid(analyzer: SP500Analyzer, start_years: List[int], thresh
     """
     print("\nGenerating spread threshold grid...")
     
-    spread_data = []
-    for start_year in start_years:
-        for threshold in thresholds:
-            result = analyzer.find_min_spread_horizon(start_year, threshold)
-            spread_data.append(result)
+    # Every (start year, threshold) search is independent pure-Python work, so
+    # large grids are spread over worker processes; each worker builds its
+    # analyzer once. Small grids (like the default 4 x 4) stay serial.
+    pairs = [(start_year, threshold) for start_year in start_years for threshold in thresholds]
+    max_workers = min(len(pairs), os.cpu_count() or 1)
+    if max_workers > 1 and len(pairs) >= SPREAD_GRID_PARALLEL_MIN_PAIRS:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_spread_worker,
+                                 initargs=(analyzer.data,)) as executor:
+            spread_data = list(executor.map(_spread_worker, pairs))
+    else:
+        spread_data = [analyzer.find_min_spread_horizon(*pair) for pair in pairs]
     
     df_spread = pd.DataFrame(spread_data)
     filepath = os.path.join(outdir, "min_spread_grid_nominal.csv")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test suite for the analysis results disk cache.
+"""
+
+import tempfile
+import unittest
+import analysis_cache
+
+
+class TestAnalysisCache(unittest.TestCase):
+    """Test cases for analysis_cache."""
+
+    def setUp(self):
+        """Point the cache at a temporary directory."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.original_dir = analysis_cache.CACHE_DIR
+        analysis_cache.CACHE_DIR = self.tmp_dir.name
+
+    def tearDown(self):
+        analysis_cache.CACHE_DIR = self.original_dir
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        """Saved results are returned for the same key."""
+        key = analysis_cache.get_cache_key('abc123', [1926], [10], [0.01])
+        self.assertIsNone(analysis_cache.load_cached_results(key))
+
+        results = {'rolling': {1926: {10: {'count': 88}}}}
+        analysis_cache.save_cached_results(key, results)
+        self.assertEqual(analysis_cache.load_cached_results(key), results)
+
+    def test_key_depends_on_inputs(self):
+        """Different data or parameters give different keys."""
+        key = analysis_cache.get_cache_key('abc123', [1926], [10], [0.01])
+        self.assertNotEqual(key, analysis_cache.get_cache_key('def456', [1926], [10], [0.01]))
+        self.assertNotEqual(key, analysis_cache.get_cache_key('abc123', [1957], [10], [0.01]))
+        self.assertNotEqual(key, analysis_cache.get_cache_key('abc123', [1926], [20], [0.01]))
+        self.assertNotEqual(key, analysis_cache.get_cache_key('abc123', [1926], [10], [0.02]))
+
+    def test_clear_cache(self):
+        """clear_cache removes stored entries."""
+        key = analysis_cache.get_cache_key('abc123', [1926], [10], [0.01])
+        analysis_cache.save_cached_results(key, {'rolling': {}})
+        analysis_cache.clear_cache()
+        self.assertIsNone(analysis_cache.load_cached_results(key))
+
+    def test_clear_cache_keeps_log(self):
+        """clear_cache leaves the app log in place."""
+        import os
+        log_path = os.path.join(self.tmp_dir.name, analysis_cache.LOG_FILE_NAME)
+        with open(log_path, 'w') as f:
+            f.write('log line\n')
+        analysis_cache.clear_cache()
+        self.assertTrue(os.path.exists(log_path))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
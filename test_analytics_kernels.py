@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test suite for the numerical kernels in analytics_kernels.
+
+The kernels must reproduce the reference results of SP500Analyzer exactly
+(within floating point tolerance) on the same data.
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+from analytics_kernels import (
+    rolling_cagr, horizon_extremes, log_return_prefix, rolling_risk_metrics, warm_up
+)
+from risk_metrics import calculate_rolling_risk_metrics
+from sp500_convergence import SP500Analyzer
+
+
+class TestRollingCagrKernel(unittest.TestCase):
+    """Test cases for the rolling CAGR kernel."""
+
+    def setUp(self):
+        """Set up sample data."""
+        years = list(range(1926, 2024))
+        np.random.seed(42)
+        returns = np.clip(np.random.normal(0.10, 0.20, len(years)), -0.5, 0.8)
+
+        self.data = pd.DataFrame({'year': years, 'return': returns})
+        self.analyzer = SP500Analyzer(self.data)
+        self.log_prefix = log_return_prefix(self.analyzer.returns)
+
+    def test_matches_analyzer(self):
+        """Kernel output matches SP500Analyzer.compute_rolling_cagr."""
+        for start_year in [1926, 1957, 1985]:
+            start_idx = self.analyzer.years.index(start_year)
+            for window in [1, 5, 10, 20, 30]:
+                expected = [cagr for _, cagr in self.analyzer.compute_rolling_cagr(window, start_year)]
+                result = rolling_cagr(self.log_prefix[start_idx:], window)
+                np.testing.assert_allclose(result, expected, rtol=0, atol=1e-12)
+
+    def test_window_too_long(self):
+        """Windows longer than the series produce an empty result."""
+        result = rolling_cagr(self.log_prefix[:6], 10)
+        self.assertEqual(result.size, 0)
+
+    def test_zero_cagr_snapped(self):
+        """Results within floating tolerance of zero are snapped to 0.0."""
+        log_prefix = log_return_prefix([0.10, -0.10 / 1.10, 0.05])
+        result = rolling_cagr(log_prefix, 2)
+        self.assertEqual(result[0], 0.0)
+
+    def test_prefix_window_sums(self):
+        """Prefix differences equal the direct window log-return sums."""
+        i, j = 10, 40
+        direct = np.log1p(np.asarray(self.analyzer.returns[i:j])).sum()
+        self.assertAlmostEqual(self.log_prefix[j] - self.log_prefix[i], direct, places=12)
+
+    def test_warm_up(self):
+        """Warm-up runs every kernel without error."""
+        warm_up()
+
+
+class TestHorizonExtremesKernel(unittest.TestCase):
+    """Test cases for the per-horizon best/worst kernel."""
+
+    def setUp(self):
+        """Set up sample data."""
+        years = list(range(1950, 2024))
+        np.random.seed(7)
+        returns = np.clip(np.random.normal(0.08, 0.18, len(years)), -0.5, 0.8)
+
+        self.analyzer = SP500Analyzer(pd.DataFrame({'year': years, 'return': returns}))
+        self.log_prefix = log_return_prefix(self.analyzer.returns)
+
+    def test_matches_rolling_cagr(self):
+        """Best/worst/mean per horizon match the full rolling series."""
+        best, worst, best_offset, worst_offset, mean = horizon_extremes(self.log_prefix)
+        self.assertEqual(len(best), len(self.analyzer.returns))
+
+        for window in [1, 3, 10, 25, len(self.analyzer.returns)]:
+            cagrs = [cagr for _, cagr in self.analyzer.compute_rolling_cagr(window, 1950)]
+            i = window - 1
+            self.assertAlmostEqual(best[i], max(cagrs), places=12)
+            self.assertAlmostEqual(worst[i], min(cagrs), places=12)
+            self.assertAlmostEqual(mean[i], np.mean(cagrs), places=12)
+            self.assertEqual(best_offset[i], int(np.argmax(cagrs)))
+            self.assertEqual(worst_offset[i], int(np.argmin(cagrs)))
+
+    def test_no_loss_horizon(self):
+        """First horizon with non-negative worst CAGR matches the analyzer."""
+        _, worst, _, _, _ = horizon_extremes(self.log_prefix)
+        expected = self.analyzer.find_min_no_loss_horizon(1950)['min_holding_years']
+        self.assertEqual(int(np.flatnonzero(worst >= 0)[0]) + 1, expected)
+
+
+
+class TestRollingRiskMetricsKernel(unittest.TestCase):
+    """Test cases for the rolling risk metrics kernel."""
+
+    METRICS = [
+        'sharpe_ratio', 'sortino_ratio', 'calmar_ratio', 'volatility', 'max_drawdown',
+        'var_95', 'cvar_95', 'var_99', 'cvar_99'
+    ]
+
+    def setUp(self):
+        """Set up sample returns and risk-free rates."""
+        np.random.seed(11)
+        self.returns = np.clip(np.random.normal(0.09, 0.19, 80), -0.5, 0.8)
+        self.rf_rates = np.where(np.arange(80) < 40, 0.04, 0.07)
+
+    def test_matches_risk_metrics_calculator(self):
+        """Every metric matches calculate_rolling_risk_metrics."""
+        for window in [1, 2, 5, 10, 30]:
+            expected = calculate_rolling_risk_metrics(self.returns.tolist(), window, self.rf_rates.tolist())
+            result = rolling_risk_metrics(self.returns, self.rf_rates, window)
+            for name, values in zip(self.METRICS, result):
+                self.assertEqual(len(values), len(expected))
+                np.testing.assert_allclose(
+                    values, [metrics[name] for metrics in expected], rtol=1e-12, atol=1e-15
+                )
+
+    def test_no_downside_gives_infinite_sortino(self):
+        """Windows without a negative excess return have an infinite Sortino ratio."""
+        returns = np.full(12, 0.10)
+        returns[::2] = 0.15
+        sortino = rolling_risk_metrics(returns, np.full(12, 0.02), 5)[1]
+        self.assertTrue(np.all(np.isinf(sortino)))
+
+    def test_window_too_long(self):
+        """Windows longer than the series produce empty results."""
+        result = rolling_risk_metrics(self.returns[:4], self.rf_rates[:4], 10)
+        self.assertTrue(all(values.size == 0 for values in result))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -5,6 +5,7 @@
 
 from sp500_convergence import SP500Analyzer, download_slickcharts_data
 from data_processor import DataProcessor
+import numpy as np
 import pandas as pd
 
 
@@ -176,6 +177,35 @@ def test_ui_config_matching():
             print(f"  ❌ 无分析结果")
 
 
+def test_rolling_dataframe_alignment():
+    """测试滚动CAGR表按结束年份对齐（不依赖网络数据）"""
+    print("\n🔍 测试滚动CAGR表结束年份对齐...")
+
+    years = list(range(1950, 1981))
+    returns = np.random.default_rng(11).normal(0.08, 0.16, len(years))
+    processor = DataProcessor()
+    processor.set_data(pd.DataFrame({'year': years, 'return': returns}))
+
+    start_year, windows = 1955, [5, 10]
+    rolling_results = processor.compute_rolling_analysis([start_year], windows)
+    frame = processor.create_rolling_cagr_dataframe(rolling_results, start_year)
+
+    # EndYear covers the shortest window's end years
+    expected_end_years = [end for end, _ in processor.analyzer.compute_rolling_cagr(5, start_year)]
+    assert frame['EndYear'].tolist() == expected_end_years
+
+    for window in windows:
+        reference = dict(processor.analyzer.compute_rolling_cagr(window, start_year))
+        column = frame.set_index('EndYear')[f'{window}y']
+        # Longer windows start later: leading rows before their first end year are NaN
+        first_end = start_year + window - 1
+        assert column.loc[:first_end - 1].isna().all()
+        assert column.loc[first_end:].notna().all()
+        for end_year, cagr in reference.items():
+            assert np.isclose(column.loc[end_year], cagr, rtol=1e-12, atol=1e-12)
+    print("  ✅ 各窗口按结束年份对齐，前导缺失为 NaN")
+
+
 def main():
     """主测试函数"""
     print("🧪 数据关联逻辑测试")
@@ -193,6 +223,9 @@ def main():
         
         # 测试UI配置匹配
         test_ui_config_matching()
+
+        # 测试滚动CAGR表对齐
+        test_rolling_dataframe_alignment()
         
         print("\n" + "=" * 60)
         print("✅ 所有测试完成")
@@ -298,6 +298,16 @@ class TestDataProcessorGIPSIntegration(unittest.TestCase):
         except Exception as e:
             self.fail(f"GIPS compliance analysis failed: {e}")
 
+    def test_benchmark_validation_returns_copies(self):
+        """Editing a benchmark validation result leaves the shared characteristics intact."""
+        first = self.processor._validate_benchmark_selection("SPY")
+        first['portfolio_characteristics']['geography'] = "EU"
+        first['benchmark_characteristics']['asset_class'] = "bond"
+
+        second = self.processor._validate_benchmark_selection("SPY")
+        self.assertEqual(second['portfolio_characteristics']['geography'], "US")
+        self.assertEqual(second['benchmark_characteristics']['asset_class'], "equity")
+
 
 def run_integration_test():
     """Run integration test with realistic scenario."""
@@ -13,7 +13,7 @@ import unittest
 import pandas as pd
 import numpy as np
 from multi_asset_engine import (
-    MultiAssetAnalyzer, AssetInfo, AssetClass, MockDataProvider, ASSET_UNIVERSE
+    MultiAssetAnalyzer, AssetInfo, AssetClass, MockDataProvider, ASSET_UNIVERSE, _frontier_closed_form
 )
 from data_processor import DataProcessor
 
@@ -171,6 +171,46 @@ class TestMultiAssetEngine(unittest.TestCase):
         for weights in frontier['weights']:
             self.assertAlmostEqual(sum(weights), 1.0, places=6)
     
+    def test_efficient_frontier_closed_form(self):
+        """Test the analytic minimum-variance frontier."""
+        frontier = self.analyzer.get_efficient_frontier(
+            self.test_symbols, self.start_year, self.end_year, num_portfolios=50, closed_form=True
+        )
+        random_frontier = self.analyzer.get_efficient_frontier(
+            self.test_symbols, self.start_year, self.end_year, num_portfolios=500
+        )
+        
+        self.assertEqual(frontier['weights'].shape, (50, len(self.test_symbols)))
+        np.testing.assert_allclose(frontier['weights'].sum(axis=1), 1.0)
+        
+        # The analytic frontier dominates the random long-only portfolios
+        self.assertLessEqual(frontier['volatility'].min(), random_frontier['volatility'].min() + 1e-4)
+        self.assertGreaterEqual(frontier['sharpe_ratio'].max(), random_frontier['sharpe_ratio'].max() - 1e-4)
+
+    def test_efficient_frontier_closed_form_brackets_tangency(self):
+        """Test that the analytic frontier grid contains the maximum-Sharpe portfolio."""
+        # Fixed inputs: the mock provider's data depends on the per-process string hash
+        rng = np.random.default_rng(3)
+        risk_free_rate = 0.03
+        for num_assets in (3, 8):
+            factors = rng.normal(size=(num_assets, num_assets))
+            cov_matrix = factors @ factors.T * 0.01 + np.eye(num_assets) * 0.01
+            expected_returns = rng.uniform(0.04, 0.12, num_assets)
+
+            weights = _frontier_closed_form(expected_returns, cov_matrix, 100, risk_free_rate)
+            returns = weights @ expected_returns
+            volatility = np.sqrt(np.einsum('ij,jk,ik->i', weights, cov_matrix, weights))
+            sharpe_ratio = (returns - risk_free_rate) / volatility
+
+            # Starts at the global minimum-variance portfolio, upper branch only
+            self.assertEqual(int(np.argmin(volatility)), 0)
+            self.assertTrue(np.all(np.diff(returns) > 0))
+
+            # The maximum-Sharpe point is interior, not where the grid ends
+            best = int(np.argmax(sharpe_ratio))
+            self.assertGreater(best, 0)
+            self.assertLess(best, 99)
+
     def test_asset_summary(self):
         """Test comprehensive asset summary."""
         summary = self.analyzer.get_asset_summary('SPY', self.start_year, self.end_year)
@@ -7,10 +7,12 @@ and validates the implementation against industry standards.
 """
 
 import unittest
+from unittest import mock
 import numpy as np
 import pandas as pd
 from risk_metrics import RiskMetricsCalculator, RiskFreeRateProvider, calculate_rolling_risk_metrics
 from sp500_convergence import SP500Analyzer
+from data_processor import DataProcessor
 
 
 class TestRiskMetricsCalculator(unittest.TestCase):
@@ -260,6 +262,48 @@ class TestRollingRiskMetrics(unittest.TestCase):
             self.assertIn('window_start_index', metrics)
             self.assertIn('window_end_index', metrics)
 
+class TestDataProcessorRiskMetrics(unittest.TestCase):
+    """Test cases for the risk metrics part of DataProcessor.compute_all_analyses."""
+
+    def setUp(self):
+        """Set up a processor with sample data."""
+        years = list(range(1990, 2021))
+        np.random.seed(7)
+        returns = np.random.normal(0.10, 0.20, len(years))
+        self.processor = DataProcessor()
+        self.processor.set_data(pd.DataFrame({'year': years, 'return': returns}))
+
+    def test_views_skip_risk_metrics(self):
+        """Rolling, no-loss and convergence views do not compute risk metrics."""
+        with mock.patch.object(self.processor.analyzer, 'compute_risk_metrics') as compute_risk:
+            self.processor.compute_rolling_analysis([1990, 2000], [5, 10])
+            self.processor.compute_no_loss_analysis([1990, 2000])
+            self.processor.compute_convergence_analysis([1990, 2000], [0.01])
+        compute_risk.assert_not_called()
+
+    def test_risk_failure_keeps_other_analyses(self):
+        """A risk metrics failure is reported per start year, other results still return."""
+        original = self.processor.analyzer.compute_risk_metrics
+
+        def failing(start_year, *args, **kwargs):
+            if start_year == 2000:
+                raise RuntimeError("rate fetch failed")
+            return original(start_year, *args, **kwargs)
+
+        with mock.patch.object(self.processor.analyzer, 'compute_risk_metrics', side_effect=failing):
+            results = self.processor.compute_all_analyses([1990, 2000], [5], [0.01])
+
+        self.assertEqual(set(results['rolling']), {1990, 2000})
+        self.assertEqual(set(results['no_loss']), {1990, 2000})
+        self.assertEqual(set(results['convergence']), {1990, 2000})
+        self.assertEqual(set(results['risk_metrics']), {1990})
+        self.assertIn("rate fetch failed", results['risk_errors'][2000])
+
+        # The failed start year is not cached, so the next call retries it
+        results = self.processor.compute_all_analyses([1990, 2000], [5], [0.01])
+        self.assertEqual(set(results['risk_metrics']), {1990, 2000})
+        self.assertEqual(results['risk_errors'], {})
+
 
 if __name__ == '__main__':
     # Run all tests
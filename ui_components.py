@@ -153,12 +153,49 @@ def display_data_summary(summary: Dict[str, Any]):
         )
 
 
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Returns the indices of n_out points that preserve the visual shape of the
+    series; the first and last points are always kept.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[hi:next_hi].mean()
+        next_y = y[hi:next_hi].mean()
+
+        area = np.abs((x[prev] - next_x) * (y[lo:hi] - y[prev])
+                      - (x[prev] - x[lo:hi]) * (next_y - y[prev]))
+        prev = lo + int(np.argmax(area))
+        indices[i + 1] = prev
+
+    return indices
+
+
 def create_returns_timeline_chart(data: pd.DataFrame):
-    """Create a timeline chart of annual returns."""
+    """Create a timeline chart of annual returns (LTTB-downsampled for long series)."""
     fig = go.Figure()
-    
+
+    max_points = CHART_CONFIG.get('max_points', 2000)
+    if len(data) > max_points:
+        data = data.iloc[lttb_indices(data['year'].to_numpy(), data['return'].to_numpy(), max_points)]
+
     # Create color array based on positive/negative returns
-    colors = [COLORS['success'] if ret > 0 else COLORS['danger'] for ret in data['return']]
+    colors = np.where(data['return'].to_numpy() > 0, COLORS['success'], COLORS['danger'])
     
     fig.add_trace(go.Bar(
         x=data['year'],
@@ -205,8 +242,8 @@ def create_rolling_cagr_chart(rolling_results: Dict[str, Any], start_year: int):
             color = colorway[i % len(colorway)] if colorway else COLORS['primary']
 
             fig.add_trace(go.Scatter(
-                x=data['end_years'],
-                y=data['cagrs'],
+                x=np.asarray(data['end_years'], dtype=np.int32),
+                y=np.asarray(data['cagrs'], dtype=np.float32),  # float32 plot buffer
                 mode='lines+markers',
                 name=f'{window}年窗口',
                 line=dict(color=color, width=2),
@@ -236,6 +273,66 @@ def create_rolling_cagr_chart(rolling_results: Dict[str, Any], start_year: int):
     return fig
 
 
+def create_rolling_cagr_subplots(rolling_results: Dict[str, Any], start_years: List[int]):
+    """Create one figure with a rolling CAGR subplot per start year (shared x axis)."""
+    start_years = [year for year in start_years if year in rolling_results]
+    if not start_years:
+        return None
+
+    fig = make_subplots(
+        rows=len(start_years), cols=1,
+        shared_xaxes=True,
+        subplot_titles=[f"起始年份: {year}" for year in start_years],
+        vertical_spacing=min(0.08, 0.3 / len(start_years))
+    )
+
+    # 同一窗口在所有子图中使用相同颜色，图例只显示一次
+    colorway = CHART_CONFIG.get('colorway', [])
+    all_windows = sorted({w for year in start_years for w in rolling_results[year].keys()})
+    legend_shown = set()
+
+    for row, start_year in enumerate(start_years, start=1):
+        year_data = rolling_results[start_year]
+        for window in sorted(year_data.keys()):
+            data = year_data[window]
+            if data is None:
+                continue
+            i = all_windows.index(window)
+            color = colorway[i % len(colorway)] if colorway else COLORS['primary']
+
+            fig.add_trace(go.Scatter(
+                x=np.asarray(data['end_years'], dtype=np.int32),
+                y=np.asarray(data['cagrs'], dtype=np.float32),  # float32 plot buffer
+                mode='lines+markers',
+                name=f'{window}年窗口',
+                legendgroup=f'window_{window}',
+                showlegend=window not in legend_shown,
+                line=dict(color=color, width=2),
+                marker=dict(size=5),
+                hovertemplate=f'<b>{start_year} · {window}年窗口</b><br>结束年份: %{{x}}<br>CAGR: %{{y:.2%}}<extra></extra>'
+            ), row=row, col=1)
+            legend_shown.add(window)
+
+    fig.update_layout(
+        title="滚动CAGR分析",
+        height=max(CHART_CONFIG['height'], 320 * len(start_years)),
+        template=CHART_CONFIG['template'],
+        font=dict(family=CHART_CONFIG['font_family'], size=CHART_CONFIG['font_size']),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        paper_bgcolor=CHART_CONFIG.get('paper_bgcolor','white'),
+        plot_bgcolor=CHART_CONFIG.get('plot_bgcolor','white'),
+        colorway=CHART_CONFIG.get('colorway')
+    )
+
+    # Add zero line and grid
+    fig.add_hline(y=0, line_dash="dash", line_color=CHART_CONFIG.get('zerolinecolor','gray'), opacity=0.5, row='all', col=1)
+    fig.update_xaxes(gridcolor=CHART_CONFIG.get('gridcolor', '#E5E7EB'))
+    fig.update_xaxes(title_text="结束年份", row=len(start_years), col=1)
+    fig.update_yaxes(tickformat='.1%', gridcolor=CHART_CONFIG.get('gridcolor', '#E5E7EB'))
+
+    return fig
+
+
 def create_window_comparison_chart(rolling_results: Dict[str, Any], start_years: List[int]):
     """Create a comparison chart of different window sizes across start years."""
     fig = make_subplots(
@@ -262,7 +359,7 @@ def create_window_comparison_chart(rolling_results: Dict[str, Any], start_years:
 
                     fig.add_trace(
                         go.Box(
-                            y=data['cagrs'],
+                            y=np.asarray(data['cagrs'], dtype=np.float32),
                             name=f'{window}年',
                             marker_color=color,
                             showlegend=(idx == 0)  # Only show legend for first subplot
@@ -284,23 +381,39 @@ def create_window_comparison_chart(rolling_results: Dict[str, Any], start_years:
     return fig
 
 
-def create_convergence_heatmap(convergence_results: Dict[str, Any], start_years: List[int], thresholds: List[float]):
+def convergence_heatmap_grid(convergence_records: Dict[str, Any], start_years: List[int], thresholds: List[float]) -> np.ndarray:
+    """Pivot the long-format convergence records into a start_year x threshold grid (NaN where missing)."""
+    long_df = pd.DataFrame({
+        'start_year': convergence_records['start_year_series'],
+        'threshold': convergence_records['threshold'],
+        'min_holding_years': pd.to_numeric(pd.Series(convergence_records['min_holding_years']), errors='coerce')
+    })
+    grid = long_df.pivot(index='start_year', columns='threshold', values='min_holding_years')
+    grid = grid.reindex(index=start_years, columns=thresholds).replace(np.inf, np.nan)
+    return grid.to_numpy(dtype=np.float64)
+
+
+def create_convergence_heatmap(convergence_results: Dict[str, Any], start_years: List[int], thresholds: List[float],
+                               convergence_records: Dict[str, Any] = None):
     """Create a heatmap showing convergence analysis results."""
     # Prepare data for heatmap
-    heatmap_data = []
-
-    for start_year in start_years:
-        if start_year in convergence_results:
-            row = []
-            for threshold in thresholds:
-                if threshold in convergence_results[start_year]:
-                    min_years = convergence_results[start_year][threshold]['min_holding_years']
-                    row.append(min_years if min_years != float('inf') else None)
-                else:
-                    row.append(None)
-            heatmap_data.append(row)
-        else:
-            heatmap_data.append([None] * len(thresholds))
+    if convergence_records is not None and len(convergence_records['start_year_series']):
+        heatmap_data = convergence_heatmap_grid(convergence_records, start_years, thresholds)
+    else:
+        heatmap_data = []
+
+        for start_year in start_years:
+            if start_year in convergence_results:
+                row = []
+                for threshold in thresholds:
+                    if threshold in convergence_results[start_year]:
+                        min_years = convergence_results[start_year][threshold]['min_holding_years']
+                        row.append(min_years if min_years != float('inf') else None)
+                    else:
+                        row.append(None)
+                heatmap_data.append(row)
+            else:
+                heatmap_data.append([None] * len(thresholds))
 
     fig = go.Figure(data=go.Heatmap(
         z=heatmap_data,
@@ -407,59 +520,72 @@ def display_analysis_table(df: pd.DataFrame, title: str, format_columns: Dict[st
     )
 
 
+def _professional_report_column(reports: Dict[str, Any], kind: str, generate, button_label: str, help_text: str,
+                                spinner_text: str, success_text: str, error_text: str,
+                                download_label: str, file_name: str, mime: str) -> None:
+    """Generate button plus download button for one professional report kind."""
+    if st.button(button_label, use_container_width=True, help=help_text):
+        try:
+            with st.spinner(spinner_text):
+                reports[kind] = generate()
+            st.success(success_text)
+        except Exception as e:
+            st.error(f"{error_text}: {str(e)}")
+
+    if reports.get(kind) is not None:
+        st.download_button(
+            label=download_label,
+            data=reports[kind],
+            file_name=file_name,
+            mime=mime,
+            use_container_width=True,
+            on_click="ignore",
+            key=f"download_professional_{kind}"
+        )
+
+
 def create_professional_report_section(data_processor) -> None:
-    """Create professional report generation section."""
+    """
+    Create professional report generation section.
+
+    Generated files are kept in st.session_state until the data or the
+    analysis results change, so tab switches and reruns reuse them.
+    """
     st.subheader("📋 专业报告生成 Professional Reports")
 
+    report_key = f"{data_processor.get_data_hash()}:{st.session_state.get('results_blob_hash')}"
+    reports = st.session_state.get('professional_reports')
+    if reports is None or reports.get('key') != report_key:
+        reports = {'key': report_key}
+        st.session_state.professional_reports = reports
+
+    today = pd.Timestamp.now().strftime('%Y%m%d')
     col1, col2, col3 = st.columns(3)
 
     with col1:
-        if st.button("📄 生成PDF报告", use_container_width=True, help="生成专业的PDF投资分析报告"):
-            try:
-                with st.spinner("正在生成PDF报告..."):
-                    pdf_data = data_processor.generate_professional_report('pdf')
-                    st.download_button(
-                        label="📥 下载PDF报告",
-                        data=pdf_data,
-                        file_name=f"sp500_analysis_report_{pd.Timestamp.now().strftime('%Y%m%d')}.pdf",
-                        mime="application/pdf",
-                        use_container_width=True
-                    )
-                    st.success("PDF报告生成成功！")
-            except Exception as e:
-                st.error(f"PDF报告生成失败: {str(e)}")
+        _professional_report_column(
+            reports, 'pdf', lambda: data_processor.generate_professional_report('pdf'),
+            "📄 生成PDF报告", "生成专业的PDF投资分析报告", "正在生成PDF报告...",
+            "PDF报告生成成功！", "PDF报告生成失败",
+            "📥 下载PDF报告", f"sp500_analysis_report_{today}.pdf", "application/pdf"
+        )
 
     with col2:
-        if st.button("📊 生成Excel报告", use_container_width=True, help="生成结构化的Excel数据报告"):
-            try:
-                with st.spinner("正在生成Excel报告..."):
-                    excel_data = data_processor.generate_professional_report('excel')
-                    st.download_button(
-                        label="📥 下载Excel报告",
-                        data=excel_data,
-                        file_name=f"sp500_analysis_data_{pd.Timestamp.now().strftime('%Y%m%d')}.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        use_container_width=True
-                    )
-                    st.success("Excel报告生成成功！")
-            except Exception as e:
-                st.error(f"Excel报告生成失败: {str(e)}")
+        _professional_report_column(
+            reports, 'excel', lambda: data_processor.generate_professional_report('excel'),
+            "📊 生成Excel报告", "生成结构化的Excel数据报告", "正在生成Excel报告...",
+            "Excel报告生成成功！", "Excel报告生成失败",
+            "📥 下载Excel报告", f"sp500_analysis_data_{today}.xlsx",
+            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
 
     with col3:
-        if st.button("📈 导出图表", use_container_width=True, help="导出高质量的分析图表"):
-            try:
-                with st.spinner("正在导出图表..."):
-                    chart_data = data_processor.export_chart('risk_metrics', 'png')
-                    st.download_button(
-                        label="📥 下载图表",
-                        data=chart_data,
-                        file_name=f"sp500_risk_metrics_chart_{pd.Timestamp.now().strftime('%Y%m%d')}.png",
-                        mime="image/png",
-                        use_container_width=True
-                    )
-                    st.success("图表导出成功！")
-            except Exception as e:
-                st.error(f"图表导出失败: {str(e)}")
+        _professional_report_column(
+            reports, 'chart', lambda: data_processor.export_chart('risk_metrics', 'png'),
+            "📈 导出图表", "导出高质量的分析图表", "正在导出图表...",
+            "图表导出成功！", "图表导出失败",
+            "📥 下载图表", f"sp500_risk_metrics_chart_{today}.png", "image/png"
+        )
 
     # Report features description
     with st.expander("📋 报告功能说明", expanded=False):
@@ -485,6 +611,30 @@ def create_professional_report_section(data_processor) -> None:
         """)
 
 
+def pdf_export_available() -> bool:
+    """Whether reportlab is installed, checked without importing it."""
+    import importlib.util
+    return importlib.util.find_spec("reportlab") is not None
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def markdown_to_pdf_bytes(md_text: str, title: str) -> bytes:
+    """Render markdown as a plain-text PDF, memoized on the text (imports reportlab on first use)."""
+    from pdf_utils import render_plain_text_to_pdf  # type: ignore
+    plain = md_text.replace('#', '').replace('*', '').replace('`', '')
+    return render_plain_text_to_pdf(
+        plain,
+        title=title,
+        footer="Generated by S&P 500 Analysis UI",
+        color_hex="#0B3B5A",
+    )
+
+
+def _markdown_to_html(md_text: str) -> str:
+    """Wrap markdown text in a minimal printable HTML page."""
+    return f"""<html><head><meta charset='utf-8'></head><body><pre style='white-space:pre-wrap;font-family:system-ui, -apple-system, Segoe UI, Roboto, Arial, sans-serif;'>{md_text}</pre></body></html>"""
+
+
 def create_download_section(data_dict: Dict[str, Any], filename_prefix: str = "sp500_analysis", layout: str = "desktop"):
     """Create download buttons for analysis results.
     - 桌面端默认：数据导出在左侧垂直排列；AI 报告导出在右侧。
@@ -504,16 +654,18 @@ def create_download_section(data_dict: Dict[str, Any], filename_prefix: str = "s
     left, right = st.columns([3, 2]) if layout == 'desktop' else st.columns(1)
 
     # 左侧：数据类导出按钮（竖排）
+    from data_processor import DataProcessor
+    to_csv = DataProcessor.export_results_to_csv
     with left:
         if has_rolling:
-            csv_data = pd.DataFrame(data_dict['rolling_cagr']).to_csv(index=False)
-            st.download_button("下载滚动CAGR数据", csv_data, file_name=f"{filename_prefix}_rolling_cagr.csv", mime="text/csv")
+            rows = data_dict['rolling_cagr']
+            st.download_button("下载滚动CAGR数据", to_csv(rows), file_name=f"{filename_prefix}_rolling_cagr.csv", mime="text/csv")
         if has_summary:
-            csv_data = pd.DataFrame(data_dict['summary']).to_csv(index=False)
-            st.download_button("下载统计摘要", csv_data, file_name=f"{filename_prefix}_summary.csv", mime="text/csv")
+            summary_rows = data_dict['summary']
+            st.download_button("下载统计摘要", to_csv(summary_rows), file_name=f"{filename_prefix}_summary.csv", mime="text/csv")
         if has_convergence:
-            csv_data = pd.DataFrame(data_dict['convergence']).to_csv(index=False)
-            st.download_button("下载收敛性分析", csv_data, file_name=f"{filename_prefix}_convergence.csv", mime="text/csv")
+            convergence_rows = data_dict['convergence']
+            st.download_button("下载收敛性分析", to_csv(convergence_rows), file_name=f"{filename_prefix}_convergence.csv", mime="text/csv")
 
     # 右侧：AI 报告导出
     target = right if layout == 'desktop' else left
@@ -521,21 +673,17 @@ def create_download_section(data_dict: Dict[str, Any], filename_prefix: str = "s
         if has_report:
             md_text = data_dict['ai_report_md']
             st.download_button("导出AI报告为Markdown (.md)", md_text, file_name=f"{filename_prefix}_ai_report.md", mime="text/markdown")
-            html_text = f"""<html><head><meta charset='utf-8'></head><body><pre style='white-space:pre-wrap;font-family:system-ui, -apple-system, Segoe UI, Roboto, Arial, sans-serif;'>{md_text}</pre></body></html>"""
-            st.download_button("导出AI报告为HTML (.html)", html_text, file_name=f"{filename_prefix}_ai_report.html", mime="text/html")
+            st.download_button("导出AI报告为HTML (.html)", _markdown_to_html(md_text), file_name=f"{filename_prefix}_ai_report.html", mime="text/html")
 
             # PDF（有依赖才显示）
-            try:
-                from pdf_utils import render_plain_text_to_pdf  # type: ignore
-                plain = md_text.replace('#','').replace('*','').replace('`','')
-                pdf_data = render_plain_text_to_pdf(
-                    plain,
-                    title="S&P 500 Rolling Returns & Convergence - AI Summary",
-                    footer="Generated by S&P 500 Analysis UI",
-                    color_hex="#0B3B5A",
+            if pdf_export_available():
+                st.download_button(
+                    "导出AI报告为PDF / Export AI Report (PDF)",
+                    markdown_to_pdf_bytes(md_text, "S&P 500 Rolling Returns & Convergence - AI Summary"),
+                    file_name=f"{filename_prefix}_ai_report.pdf",
+                    mime="application/pdf"
                 )
-                st.download_button("导出AI报告为PDF / Export AI Report (PDF)", pdf_data, file_name=f"{filename_prefix}_ai_report.pdf", mime="application/pdf")
-            except Exception as e:
+            else:
                 st.caption("PDF导出不可用：未安装 reportlab 或被网络阻断。可先下载 HTML 并在浏览器中打印为 PDF。")
 
 
@@ -581,7 +729,6 @@ def generate_summary_report(rolling_results: Dict[str, Any], no_loss_results: Di
 
         # 若未指定目标阈值，尝试使用阈值列表中位数
         if target_threshold is None and thresholds:
-            import numpy as np
             target_threshold = float(np.median(thresholds))
 
         # 每个起始年份的要点
@@ -596,33 +743,28 @@ def generate_summary_report(rolling_results: Dict[str, Any], no_loss_results: Di
             avg_cagr_overall = nl.get('average_cagr')
 
             # 滚动窗口稳定性与收益
+            # 各窗口的 std/avg 堆叠为数组（缺失为 NaN），numpy 标量与 Python 数值一视同仁
+            windows_present = [w for w in sorted(roll.keys()) if roll[w]]
+            stds = np.array([roll[w].get('std_cagr', np.nan) for w in windows_present], dtype=np.float64)
+            avgs = np.array([roll[w].get('avg_cagr', np.nan) for w in windows_present], dtype=np.float64)
             stable_window = None
             stable_std = None
             best_avg_window = None
             best_avg_val = None
-            for w in sorted(roll.keys()):
-                datum = roll[w]
-                if not datum:
-                    continue
-                std = datum.get('std_cagr')
-                avg = datum.get('avg_cagr')
-                if isinstance(std, (int, float)):
-                    if stable_std is None or std < stable_std:
-                        stable_std = float(std)
-                        stable_window = w
-                if isinstance(avg, (int, float)):
-                    if best_avg_val is None or avg > best_avg_val:
-                        best_avg_val = float(avg)
-                        best_avg_window = w
+            if not np.isnan(stds).all():
+                i = int(np.nanargmin(stds))
+                stable_window, stable_std = windows_present[i], float(stds[i])
+            if not np.isnan(avgs).all():
+                i = int(np.nanargmax(avgs))
+                best_avg_window, best_avg_val = windows_present[i], float(avgs[i])
 
             # 参考窗口：优先20年
             ref_window = 20 if 20 in roll else (max(roll.keys()) if roll else None)
             ref_avg = roll.get(ref_window, {}).get('avg_cagr') if ref_window else None
             ref_stats = None
             if ref_window and roll.get(ref_window):
-                import numpy as np
                 cagrs = roll[ref_window]['cagrs']
-                if cagrs:
+                if len(cagrs):
                     p10 = float(np.percentile(cagrs, 10))
                     p50 = float(np.percentile(cagrs, 50))
                     p90 = float(np.percentile(cagrs, 90))
@@ -636,7 +778,6 @@ def generate_summary_report(rolling_results: Dict[str, Any], no_loss_results: Di
                 vals = [conv[t]['min_holding_years'] for t in thresholds if t in conv]
                 vals = [v for v in vals if isinstance(v, (int, float)) and v != float('inf')]
                 if vals:
-                    import numpy as np
                     conv_years = int(np.median(vals))
 
             # 建议最短持有期（取无损失期与收敛期的较大者）
@@ -717,7 +858,6 @@ def generate_summary_report(rolling_results: Dict[str, Any], no_loss_results: Di
             vals = [conv[t]['min_holding_years'] for t in thresholds if t in conv]
             vals = [v for v in vals if isinstance(v, (int, float)) and v != float('inf')]
             if vals:
-                import numpy as np
                 stability.append((sy, float(np.median(vals))))
         if stability:
             stability.sort(key=lambda x: x[1])